@@ -0,0 +1,7 @@
+-- Mediana e quartis do preço por tipo em um conjunto de bairros, a partir
+-- dos sketches da gold (sem ler os anúncios). Compile com `dbt compile`.
+{{ mesclar_sketch(
+    "metrica = 'preco' AND localizacao IN ('Aldeota', 'Meireles', 'Cocó')",
+    ['tipo'],
+    [0.25, 0.5, 0.75]
+) }}
@@ -0,0 +1,12 @@
+{#
+    Chave UBIGINT do anúncio: os primeiros 64 bits do SHA256 dos campos
+    principais, separados por '|' (preço em DECIMAL, para não depender da
+    formatação de DOUBLE). A chave está fixada: ao contrário de HASH(), cujo
+    resultado o DuckDB não garante entre versões, o SHA256 não muda, e os
+    meses já gravados pelos modelos incrementais mantêm as mesmas chaves
+    dos meses novos. Alterar a expressão exige --full-refresh da silver e
+    de tudo abaixo dela.
+#}
+{% macro chave_anuncio() %}
+('0x' || LEFT(SHA256(CONCAT_WS('|', origem, tipo, COALESCE(localizacao, ''), area, quartos, banheiros, vagas, CAST(preco AS DECIMAL(18, 2)))), 16))::UBIGINT
+{% endmacro %}
@@ -0,0 +1,8 @@
+{#
+    Chave normalizada de um nome de bairro: minúsculas, sem acentos e com
+    pontuação e espaços repetidos reduzidos a um espaço
+    ('Boa Vista-Castelão' -> 'boa vista castelao').
+#}
+{% macro chave_bairro(coluna) %}
+TRIM(REGEXP_REPLACE(STRIP_ACCENTS(LOWER({{ coluna }})), '[^a-z0-9]+', ' ', 'g'))
+{% endmacro %}
@@ -0,0 +1,36 @@
+{#
+    Quantis a partir da mescla dos sketches da sketch_imoveis: soma as
+    contagens de cada bucket das partições selecionadas ('filtro') por
+    grupo ('agrupamento') e retorna, para cada quantil q, o valor do bucket
+    que contém o elemento de posição q * (n - 1). O erro relativo em relação
+    a esse elemento é de no máximo alpha (var sketch_alpha).
+
+    Ex: {{ mesclar_sketch("metrica = 'preco' AND localizacao IN ('Aldeota', 'Meireles')", ['tipo'], [0.5]) }}
+#}
+{% macro mesclar_sketch(filtro='TRUE', agrupamento=[], quantis=[0.5]) %}
+WITH mesclado AS (
+    SELECT
+        {% for coluna in agrupamento %}{{ coluna }}, {% endfor %}
+        bucket,
+        ANY_VALUE(valor) AS valor,
+        SUM(qtd) AS qtd
+    FROM {{ ref('sketch_imoveis') }}
+    WHERE {{ filtro }}
+    GROUP BY ALL
+), acumulado AS (
+    SELECT
+        *,
+        SUM(qtd) OVER (PARTITION BY {{ (agrupamento or ['1']) | join(', ') }} ORDER BY bucket) AS acumulado,
+        SUM(qtd) OVER (PARTITION BY {{ (agrupamento or ['1']) | join(', ') }}) AS total
+    FROM mesclado
+)
+SELECT
+    {% for coluna in agrupamento %}{{ coluna }},
+    {% endfor %}
+    ANY_VALUE(total) AS qtd_imoveis,
+    {% for q in quantis %}
+    ARG_MIN(valor, bucket) FILTER (WHERE acumulado > {{ q }} * (total - 1)) AS q{{ (q * 100) | int }}{{ "," if not loop.last }}
+    {% endfor %}
+FROM acumulado
+GROUP BY ALL
+{% endmacro %}
@@ -0,0 +1,29 @@
+{#
+    CTEs com os meses que um mart incremental precisa recalcular: o
+    primeiro date_ref cuja assinatura (contagem e hash das linhas da obt)
+    difere da gravada no mart e os meses seguintes, cuja variação mensal
+    pode depender dele. Na carga mensal, só o mês novo. Fora do modo
+    incremental, todos os meses.
+#}
+{% macro meses_alterados(obt) %}
+entrada AS (
+    SELECT
+        date_ref,
+        COUNT(*) || '-' || BIT_XOR(HASH(id, tipo, localizacao, area, preco)) AS assinatura
+    FROM {{ obt }}
+    GROUP BY date_ref
+), alterados AS (
+    SELECT date_ref
+    FROM entrada
+    {% if is_incremental() %}
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {{ this }} mart
+        WHERE mart.date_ref = entrada.date_ref AND mart.assinatura = entrada.assinatura
+    )
+    {% endif %}
+), recalcular AS (
+    SELECT date_ref, assinatura
+    FROM entrada
+    WHERE date_ref >= (SELECT MIN(date_ref) FROM alterados)
+)
+{% endmacro %}
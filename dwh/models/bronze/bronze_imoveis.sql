@@ -9,10 +9,16 @@ SELECT
     tipo , 
     localizacao, 
     area, 
+    area_max, 
     quartos, 
+    quartos_max, 
     banheiros, 
+    banheiros_max, 
     vagas, 
+    vagas_max, 
     preco, 
     condo, 
+    duplicata_de, 
+    arquivo, 
     CURRENT_TIMESTAMP AS ingestion_timestamp
-FROM {{ source ('imoveis_2025', 'abril') }}
\ No newline at end of file
+FROM {{ source ('lake', 'imoveis') }}
\ No newline at end of file
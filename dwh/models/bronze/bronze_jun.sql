@@ -1,18 +0,0 @@
-{{ config(
-    materialized='view',
-	tags = ['bronze']
-) }}
-
-SELECT
-    origem,
-    date_ref,
-    tipo , 
-    localizacao, 
-    area, 
-    quartos, 
-    banheiros, 
-    vagas, 
-    preco, 
-    condo, 
-    CURRENT_TIMESTAMP AS ingestion_timestamp
-FROM {{ source ('imoveis_2025', 'jun') }}
\ No newline at end of file
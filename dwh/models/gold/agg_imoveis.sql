@@ -0,0 +1,26 @@
+{{ config(
+    materialized='table',
+	tags = ['gold']
+) }}
+
+{% set dimensoes = ['date_ref', 'tipo', 'localizacao', 'secretaria_regional', 'faixa_preco'] %}
+
+-- Estatísticas de preço para todas as combinações das dimensões filtradas
+-- no dashboard. 'Todos' marca uma dimensão agregada (fora do agrupamento).
+SELECT
+	{% for dimensao in dimensoes %}
+	CASE WHEN GROUPING({{ dimensao }}) = 1 THEN 'Todos' ELSE {{ dimensao }} END AS {{ dimensao }},
+	{% endfor %}
+	COUNT(*) AS qtd_imoveis,
+	ROUND(AVG(preco), 2) AS preco_medio,
+	ROUND(STDDEV_SAMP(preco), 2) AS preco_desvio,
+	MIN(preco) AS preco_min,
+	ROUND(QUANTILE_CONT(preco, 0.25), 2) AS preco_q1,
+	ROUND(MEDIAN(preco), 2) AS preco_mediano,
+	ROUND(QUANTILE_CONT(preco, 0.75), 2) AS preco_q3,
+	MAX(preco) AS preco_max,
+	ROUND(AVG(preco/area), 2) AS preco_m2_medio,
+	ROUND(MEDIAN(preco/area), 2) AS preco_m2_mediano,
+    CURRENT_TIMESTAMP AS ingestion_timestamp
+FROM {{ ref('obt_imoveis') }}
+GROUP BY CUBE ({{ dimensoes | join(', ') }})
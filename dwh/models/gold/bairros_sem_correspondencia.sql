@@ -0,0 +1,17 @@
+{{ config(
+    materialized='table',
+	tags = ['gold']
+) }}
+
+SELECT
+	silver.localizacao,
+	{{ chave_bairro('silver.localizacao') }} AS chave,
+	COUNT(*) AS qtd_imoveis,
+	MIN(silver.date_ref) AS primeiro_date_ref,
+	MAX(silver.date_ref) AS ultimo_date_ref
+FROM {{ ref('silver_imoveis') }} silver
+LEFT JOIN {{ ref('dim_bairro') }} dim
+	ON dim.chave = {{ chave_bairro('silver.localizacao') }}
+WHERE dim.chave IS NULL
+GROUP BY silver.localizacao
+ORDER BY qtd_imoveis DESC
@@ -0,0 +1,26 @@
+{{ config(
+    materialized='table',
+	tags = ['gold']
+) }}
+
+WITH bairros AS (
+SELECT
+	{{ chave_bairro('bairro') }} AS chave,
+	bairro,
+	secretaria_regional,
+	prox_orla,
+	prox_centro
+FROM {{ ref('bairros') }}
+), aliases AS (
+SELECT
+	{{ chave_bairro('alias.alias') }} AS chave,
+	bairros.bairro,
+	bairros.secretaria_regional,
+	bairros.prox_orla,
+	bairros.prox_centro
+FROM {{ ref('bairros_alias') }} alias
+JOIN bairros ON bairros.chave = {{ chave_bairro('alias.bairro') }}
+)
+SELECT * FROM bairros
+UNION ALL
+SELECT * FROM aliases WHERE chave NOT IN (SELECT chave FROM bairros)
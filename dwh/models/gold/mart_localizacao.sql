@@ -1,14 +1,17 @@
 {{ config(
-    materialized='table',
+    materialized='incremental',
+	incremental_strategy='delete+insert',
+	unique_key='date_ref',
 	tags = ['gold']
 ) }}
 
-
-WITH stats AS (
+WITH {{ meses_alterados(ref('obt_imoveis')) }},
+stats AS (
     SELECT 
         localizacao,
 		secretaria_regional,
         date_ref,
+        assinatura,
         COUNT(*) AS qtd_imoveis,
         COUNT(CASE WHEN preco <= 200000 THEN 1 END) AS faixa_1,
         COUNT(CASE WHEN preco BETWEEN 200001 AND 500000 THEN 1 END) AS faixa_2,
@@ -20,13 +23,31 @@ WITH stats AS (
         ROUND(AVG(preco/area), 2) AS preco_m2_medio,
         ROUND(MEDIAN(preco/area), 2) AS preco_m2_mediano
     FROM {{ ref('obt_imoveis') }}
+    JOIN recalcular USING (date_ref)
     GROUP BY ALL
     HAVING qtd_imoveis > 20
+), historico AS (
+    -- Medianas gravadas no mart (meses não recalculados) e as recalculadas agora
+    {% if is_incremental() %}
+    SELECT localizacao, date_ref, preco_m2_mediano
+    FROM {{ this }}
+    WHERE date_ref NOT IN (SELECT date_ref FROM recalcular)
+    UNION ALL
+    {% endif %}
+    SELECT localizacao, date_ref, preco_m2_mediano
+    FROM stats
 ), var AS (
 SELECT 
-	*,
-	LAG(preco_m2_mediano, 1, NULL) OVER (PARTITION BY localizacao ORDER BY date_ref) AS mes_anterior_m2
-FROM stats)
+	stats.*,
+	anterior.mes_anterior_m2
+FROM stats
+JOIN (
+	SELECT
+		localizacao,
+		date_ref,
+		LAG(preco_m2_mediano, 1, NULL) OVER (PARTITION BY localizacao ORDER BY date_ref) AS mes_anterior_m2
+	FROM historico) anterior
+	USING (localizacao, date_ref))
 SELECT
 	date_ref,
 	localizacao,
@@ -45,5 +66,6 @@ SELECT
 		WHEN mes_anterior_m2 IS NOT NULL THEN ROUND((((preco_m2_mediano - mes_anterior_m2 ) / mes_anterior_m2) * 100), 2)
 		ELSE 0
 	END AS variacao_m2_pct,
+	assinatura,
     CURRENT_TIMESTAMP AS ingestion_timestamp
 FROM var
@@ -1,12 +1,16 @@
 {{ config(
-    materialized='table',
+    materialized='incremental',
+	incremental_strategy='delete+insert',
+	unique_key='date_ref',
 	tags = ['gold']
 ) }}
 
-WITH stats AS (
+WITH {{ meses_alterados(ref('obt_imoveis')) }},
+stats AS (
     SELECT 
         tipo,
         date_ref,
+        assinatura,
         COUNT(*) AS qtd_imoveis,
         COUNT(CASE WHEN preco <= 200000 THEN 1 END) AS faixa_1,
         COUNT(CASE WHEN preco BETWEEN 200001 AND 500000 THEN 1 END) AS faixa_2,
@@ -18,13 +22,31 @@ WITH stats AS (
         ROUND(AVG(preco/area), 2) AS preco_m2_medio,
         ROUND(MEDIAN(preco/area), 2) AS preco_m2_mediano
     FROM {{ ref('obt_imoveis') }}
-    GROUP BY tipo, date_ref
+    JOIN recalcular USING (date_ref)
+    GROUP BY tipo, date_ref, assinatura
     HAVING qtd_imoveis > 20
+), historico AS (
+    -- Medianas gravadas no mart (meses não recalculados) e as recalculadas agora
+    {% if is_incremental() %}
+    SELECT tipo, date_ref, preco_m2_mediano
+    FROM {{ this }}
+    WHERE date_ref NOT IN (SELECT date_ref FROM recalcular)
+    UNION ALL
+    {% endif %}
+    SELECT tipo, date_ref, preco_m2_mediano
+    FROM stats
 ), var AS (
 SELECT 
-	*,
-	LAG(preco_m2_mediano, 1, NULL) OVER (PARTITION BY tipo ORDER BY date_ref) AS mes_anterior_m2,
-FROM stats)
+	stats.*,
+	anterior.mes_anterior_m2
+FROM stats
+JOIN (
+	SELECT
+		tipo,
+		date_ref,
+		LAG(preco_m2_mediano, 1, NULL) OVER (PARTITION BY tipo ORDER BY date_ref) AS mes_anterior_m2
+	FROM historico) anterior
+	USING (tipo, date_ref))
 SELECT
 	date_ref,
 	tipo,
@@ -42,5 +64,6 @@ SELECT
 		WHEN mes_anterior_m2 IS NOT NULL THEN ROUND((((preco_m2_mediano - mes_anterior_m2 ) / mes_anterior_m2) * 100), 2)
 		ELSE 0
 	END AS variacao_m2_pct,
+	assinatura,
     CURRENT_TIMESTAMP AS ingestion_timestamp
-FROM var
\ No newline at end of file
+FROM var
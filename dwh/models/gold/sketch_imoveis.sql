@@ -0,0 +1,40 @@
+{{ config(
+    materialized='table',
+	tags = ['gold']
+) }}
+
+{# Erro relativo máximo dos quantis lidos dos sketches (alpha do DDSketch) #}
+{% set alpha = var('sketch_alpha', 0.01) %}
+{% set gamma = (1 + alpha) / (1 - alpha) %}
+
+-- Sketches de quantis (DDSketch) do preço e do preço do m² por mês, tipo,
+-- bairro e faixa de preço: cada valor cai no bucket CEIL(LOG_gamma(valor))
+-- e o sketch é a contagem por bucket. Sketches de qualquer conjunto de
+-- partições se mesclam somando as contagens de cada bucket (macro
+-- mesclar_sketch), e o quantil lido tem erro relativo de no máximo alpha.
+WITH valores AS (
+SELECT date_ref, tipo, localizacao, secretaria_regional, faixa_preco, 'preco' AS metrica, preco AS valor
+FROM {{ ref('obt_imoveis') }}
+UNION ALL
+SELECT date_ref, tipo, localizacao, secretaria_regional, faixa_preco, 'preco_m2' AS metrica, preco/area AS valor
+FROM {{ ref('obt_imoveis') }}
+), buckets AS (
+SELECT
+	*,
+	CAST(CEIL(LN(valor) / LN({{ gamma }})) AS INTEGER) AS bucket
+FROM valores
+WHERE valor > 0
+)
+SELECT
+	date_ref,
+	tipo,
+	localizacao,
+	secretaria_regional,
+	faixa_preco,
+	metrica,
+	bucket,
+	2 * POW({{ gamma }}, bucket) / ({{ gamma }} + 1) AS valor,
+	COUNT(*) AS qtd,
+    CURRENT_TIMESTAMP AS ingestion_timestamp
+FROM buckets
+GROUP BY ALL
@@ -0,0 +1,51 @@
+{{ config(
+    materialized='incremental',
+	incremental_strategy='delete+insert',
+	unique_key='date_ref',
+	on_schema_change='append_new_columns',
+	tags = ['silver']
+) }}
+
+WITH clean AS (
+SELECT
+	{{ chave_anuncio() }} AS id
+	, origem 
+	, date_ref
+	, tipo
+	, localizacao
+	, area
+	, area_max
+	, quartos
+	, quartos_max
+	, banheiros
+	, banheiros_max
+	, vagas
+	, vagas_max
+	, preco
+	, COALESCE(condo, 0) AS condo
+FROM {{ ref('bronze_imoveis') }}
+WHERE 
+	preco > 65000
+	AND quartos BETWEEN 1 AND 10
+	AND banheiros BETWEEN 1 AND 10
+	AND vagas BETWEEN 1 AND 10
+	AND area BETWEEN 30 AND 1000
+	-- Anúncio ligado pela deduplicação a um de outro portal (já na silver)
+	AND duplicata_de IS NULL
+{% if var('date_ref', none) %}
+	AND date_ref = '{{ var('date_ref') }}'
+{% elif is_incremental() %}
+	AND date_ref >= (SELECT MAX(date_ref) FROM {{ this }})
+{% endif %}
+),
+-- Os filtros usam só campos da chave e duplicata_de, então podem vir antes da
+-- deduplicação, que escolhe um anúncio por (id, date_ref) em uma única agregação
+deduplication AS (
+SELECT
+	ARG_MAX(clean, preco) AS anuncio
+FROM clean
+GROUP BY id, date_ref)
+SELECT 
+	anuncio.*
+	, CURRENT_TIMESTAMP AS ingestion_timestamp
+FROM deduplication
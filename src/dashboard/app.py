@@ -1,7 +1,9 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-import duckdb
+import cache
+import pool
+import queries
 import utils
 
 # === PAGE CONFIG ===
@@ -12,15 +14,37 @@ st.set_page_config(
 )
 
 # === FUNÇÕES ===
-@st.cache_data
-def query_data(query: str):
+@st.cache_resource
+def connection_pool():
+    """
+    Conexão somente leitura com a cópia publicada do banco, compartilhada
+    por todas as sessões do processo (ver pool.py).
+    """
+    return pool.ReadOnlyPool()
+
+
+@st.cache_resource
+def query_cache():
+    """
+    Cache em disco dos resultados, compartilhado entre os processos e
+    renovado a cada build publicado (ver cache.py).
+    """
+    return cache.QueryCache()
+
+
+def query_data(query: str, params: list = None):
     """
     Carrega dados resultado de um query no diretamente no banco de dados.
+    Os valores dos filtros vão em 'params' (ver queries.py).
     """
     try:
-        conn = duckdb.connect("data/database.duckdb")
-        result = conn.execute(query).fetchdf()
-        conn.close()
+        build_id, _ = connection_pool().published()
+        result = query_cache().get(query, params, build_id)
+        if result is None:
+            result = connection_pool().query(query, params)
+            # Se um build novo foi publicado durante a consulta, não guarda no anterior
+            if connection_pool().published()[0] == build_id:
+                query_cache().put(query, params, build_id, result)
         return result
     except Exception as e:
         st.error(f"Erro ao consultas dados: {e}")
@@ -28,9 +52,13 @@ def query_data(query: str):
 
 
 # === DADOS ===
-df = query_data("SELECT *, (preco/area) AS preco_m2 FROM main_gold.obt_imoveis")
+# Só as opções dos filtros; cada elemento consulta os próprios agregados
+opcoes = {
+    dimensao: query_data(*queries.options_query(dimensao))
+    for dimensao in ['tipo', 'localizacao', 'secretaria_regional']
+}
 
-if df.empty:
+if any(valores.empty for valores in opcoes.values()):
     st.error("Não foi possível carregar os dados. Verifique a conexão com o banco.")
     st.stop()
 
@@ -46,38 +74,50 @@ with st.sidebar:
     st.header("Filtros")
 
     # Filtro por Tipo de Imóvel
-    tipos_unicos = df['tipo'].unique()
+    tipos_unicos = opcoes['tipo']['tipo']
     tipo_selecionado = st.selectbox("Tipo de Imóvel", ['Todos'] + list(tipos_unicos))
 
     # Filtro por Bairro (Localização)
-    bairros_unicos = df['localizacao'].unique()
+    bairros_unicos = opcoes['localizacao']['localizacao']
     bairros_selecionados = st.multiselect("Bairro", bairros_unicos)
 
-    # Filtro por SER (se presente nos seus dados)
-    if 'secretaria_regional' in df.columns:
-        sers_unicos = df['secretaria_regional'].unique()
-        sers_unicos = sorted(sers_unicos)
-        ser_selecionado = st.selectbox("Secretaria Executiva Regional", ['Todos'] + list(sers_unicos))
+    # Filtro por SER
+    sers_unicos = opcoes['secretaria_regional']['secretaria_regional']
+    ser_selecionado = st.selectbox("Secretaria Executiva Regional", ['Todos'] + list(sers_unicos))
 
-    # Filtro por Faixa de Preço
-    preco_min, preco_max = int(df['preco'].min()), int(df['preco'].max())
-    preco_range = st.slider("Faixa de Preço (R$)", preco_min, preco_max, (preco_min, preco_max))
+    # Filtro por Faixa de Preço (as mesmas faixas do cubo agg_imoveis)
+    faixas = {
+        'Todos': 'Todas',
+        '1': 'Até R$ 200 mil',
+        '2': 'R$ 200 mil a 500 mil',
+        '3': 'R$ 500 mil a 1 mi',
+        '4': 'R$ 1 mi a 5 mi',
+        '5': 'Acima de R$ 5 mi'
+    }
+    faixa_selecionada = st.selectbox("Faixa de Preço", list(faixas), format_func=faixas.get)
 
 
 # === APLICAÇÃO DOS FILTROS ===
-df_filtrado = df.copy()
-
-if tipo_selecionado != 'Todos':
-    df_filtrado = df_filtrado[df_filtrado['tipo'] == tipo_selecionado]
+filtros = {
+    'tipo': tipo_selecionado,
+    'localizacao': bairros_selecionados[0] if len(bairros_selecionados) == 1 else 'Todos',
+    'secretaria_regional': ser_selecionado,
+    'faixa_preco': faixa_selecionada
+}
 
-if bairros_selecionados:
-    df_filtrado = df_filtrado[df_filtrado['localizacao'].isin(bairros_selecionados)]
 
-preco_min_selecionado, preco_max_selecionado = preco_range
-df_filtrado = df_filtrado[(df_filtrado['preco'] >= preco_min_selecionado) & (df_filtrado['preco'] <= preco_max_selecionado)]
-
-if 'secretaria_regional' in df.columns and ser_selecionado != 'Todos':
-    df_filtrado = df_filtrado[df_filtrado['secretaria_regional'] == ser_selecionado]
+def agregados(por: list = []):
+    """
+    Estatísticas de preço com os filtros da sidebar, agrupadas por 'por'.
+    Lê só as linhas necessárias do cubo pré-agregado; com mais de um bairro
+    selecionado as medianas vêm da mescla dos sketches de quantis de cada
+    bairro.
+    """
+    if len(bairros_selecionados) > 1:
+        cubo = query_data(*queries.cube_query(filtros, por, bairros_selecionados))
+        sketches = query_data(*queries.sketch_query(filtros, bairros_selecionados))
+        return utils.combine_locations(cubo, sketches, filtros, bairros_selecionados, por)
+    return query_data(*queries.cube_query(filtros, por))
 
 
 # === TAB OVERVIEW ===
@@ -85,27 +125,27 @@ with tab_overview:
 
     # KPIs
     col1, col2, col3, col4 = st.columns(4)
+    totais = agregados()
+    total = totais.iloc[0] if not totais.empty else pd.Series({'qtd_imoveis': 0, 'preco_medio': 0, 'preco_mediano': 0})
 
     with col1:
         st.metric(
             label="🏡 Total de Anúncios Analisados", 
-            value=utils.format_numbers(df_filtrado.shape[0])
+            value=utils.format_numbers(total['qtd_imoveis'])
         )
     with col2:
         st.metric(
             label="💸 Preço Médio", 
-            value=utils.format_currency(df_filtrado['preco'].mean())
+            value=utils.format_currency(total['preco_medio'])
         )
     with col3:
         st.metric(
             label="💸 Preço Mediano",
-            value=utils.format_currency(df_filtrado['preco'].median())
+            value=utils.format_currency(total['preco_mediano'])
         )
     with col4:
         # Evolução de preço
-        preco_evo = df_filtrado.groupby("date_ref").agg(
-            preco_mediano = ('preco', 'median')
-        ).reset_index()
+        preco_evo = agregados(['date_ref'])[['date_ref', 'preco_mediano']].sort_values(by='date_ref').reset_index(drop=True)
         preco_evo['var'] = round(preco_evo['preco_mediano'].pct_change() * 100, 2)
         preco_evo['date_ref'] = preco_evo['date_ref'].replace('2025-04', 'Abril/2025')
         preco_evo['date_ref'] = preco_evo['date_ref'].replace('2025-05', 'Maio/2025')
@@ -128,7 +168,7 @@ with tab_overview:
 
     col5, col6 = st.columns(2)
     with col5:
-        top_bairros = df_filtrado.groupby("localizacao").agg(preco_m2 = ('preco_m2', 'median')).sort_values(by='preco_m2', ascending=False).reset_index()
+        top_bairros = agregados(['localizacao']).rename(columns={'preco_m2_mediano': 'preco_m2'}).sort_values(by='preco_m2', ascending=False)
         top_bairros = top_bairros.head()
         st.plotly_chart(
             utils.plot_bar(top_bairros, 
@@ -141,12 +181,13 @@ with tab_overview:
     with col6:
         st.plotly_chart(
             utils.plot_bar(
-                df_filtrado[df_filtrado['preco'] <= 1_000_000],
+                query_data(*queries.histogram_query(filtros, bairros_selecionados)),
                 '💰 Distribuição dos Preços (até 1mi)',
                 x='preco',
+                y='percentual',
                 color='tipo',
-                histnorm='percent',
-                xlabel='Preço (R$)'
+                xlabel='Preço (R$)',
+                ylabel='Proporção (%)'
             )
         )
     st.markdown("---")
@@ -185,17 +226,18 @@ with tab_report:
             e Fátima o que aponta um bom momento para investir nestes bairros. 
             """
         )
+        geral = query_data(*queries.cube_query({})).iloc[0]
         descritivas_df = pd.DataFrame({
             "Medida": ['Média', 'Desvio Padrão', 'Quartil 1',
                        'Quartil 2 (Mediana)', 'Quartil 3',
                        'Mínimo', 'Máximo'],
-            "Resultado": [utils.format_currency(df['preco'].mean()), 
-                          utils.format_currency(df['preco'].std()), 
-                          utils.format_currency(df['preco'].quantile(0.25)),
-                          utils.format_currency(df['preco'].median()), 
-                          utils.format_currency(df['preco'].quantile(0.75)), 
-                          utils.format_currency(df['preco'].min()), 
-                          utils.format_currency(df['preco'].max())]
+            "Resultado": [utils.format_currency(geral['preco_medio']), 
+                          utils.format_currency(geral['preco_desvio']), 
+                          utils.format_currency(geral['preco_q1']),
+                          utils.format_currency(geral['preco_mediano']), 
+                          utils.format_currency(geral['preco_q3']), 
+                          utils.format_currency(geral['preco_min']), 
+                          utils.format_currency(geral['preco_max'])]
         })
         st.markdown("##### 🔎 Estatísticas Descritivas dos Preços")
         st.dataframe(descritivas_df)
@@ -229,9 +271,9 @@ with tab_report:
         )
         col7, col8 = st.columns(2)
         with col7:
-            st.plotly_chart(utils.plot_pie(df_filtrado, 'tipo',title='🏡 Distribuição por Tipo de Imóvel'))
+            st.plotly_chart(utils.plot_pie(agregados(['tipo']), 'tipo', values='qtd_imoveis', title='🏡 Distribuição por Tipo de Imóvel'))
         with col8:
-            st.plotly_chart(utils.plot_bar(df_filtrado, '🏢 Distribuição por Faixa de Preço', 'faixa_preco', xlabel='Faixa de Preço',histnorm='percent'))
+            st.plotly_chart(utils.plot_bar(agregados(['faixa_preco']), '🏢 Distribuição por Faixa de Preço', 'faixa_preco', y='qtd_imoveis', xlabel='Faixa de Preço',histnorm='percent'))
         st.markdown("---")
 
         por_tipo = st.container()
@@ -267,7 +309,7 @@ with tab_report:
             st.dataframe(variacao_precos_df)
 
             #variacao_m2_pct
-            faixa_tipo = df_filtrado.groupby(["tipo", "faixa_preco"]).agg(preco_medio = ('preco', 'count')).reset_index()
+            faixa_tipo = agregados(['tipo', 'faixa_preco']).rename(columns={'qtd_imoveis': 'preco_medio'})
             st.plotly_chart(
                 utils.plot_bar(
                     faixa_tipo,
@@ -362,8 +404,7 @@ with tab_report:
 
                 col9, col10 = st.columns(2)
                 with col9:
-                    local_rank = df.copy()
-                    local_rank = local_rank.groupby(["localizacao"]).agg(preco_medio = ('preco', 'mean'), m2_mediano = ('preco_m2', 'median')).reset_index()
+                    local_rank = query_data(*queries.cube_query({}, ['localizacao'])).rename(columns={'preco_m2_mediano': 'm2_mediano'})
                     st.plotly_chart(
                         utils.plot_bar(
                             local_rank.sort_values(by='m2_mediano', ascending=False).head(),
@@ -0,0 +1,147 @@
+"""
+Cache em disco dos resultados das consultas do dashboard, compartilhado
+por todos os processos do Streamlit.
+
+Cada resultado é um arquivo Arrow IPC em <pasta>/<build_id>/<chave>.arrow,
+com a chave calculada do SQL normalizado (espaços colapsados fora das
+strings) e dos parâmetros. O build_id é o da cópia publicada do banco
+(pool.py), então um build novo muda todas as chaves e, na primeira
+gravação de cada processo nele, as pastas dos builds anteriores são
+apagadas (só as anteriores: um processo que ainda não viu a publicação
+nova não apaga a pasta dela). Os arquivos são gravados de forma atômica e
+lidos por memory map; cada leitura atualiza o mtime, que serve de ordem
+do LRU. Cada processo soma os bytes que grava sobre o tamanho da pasta
+medido na troca de build e só percorre a pasta quando essa conta passa
+de 'max_bytes': então os arquivos usados há mais tempo são removidos.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+
+STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+
+def build_order(build_id: str):
+    """
+    Ordem dos builds: os do banco local (pool.py, 'local-<mtime>') vêm antes
+    dos publicados, e cada grupo segue a ordem do próprio id.
+    """
+    return not build_id.startswith("local"), build_id
+
+
+def normalize_sql(sql: str):
+    """
+    Colapsa espaços e quebras de linha fora das strings e remove o ';' final.
+    """
+    parts = STRING_LITERAL.split(sql)
+    parts = [part if index % 2 else re.sub(r"\s+", " ", part) for index, part in enumerate(parts)]
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+class QueryCache:
+    """
+    Resultados de consultas em Arrow IPC, por build do warehouse, com LRU
+    por bytes.
+
+    Args:
+        - pasta (str): Pasta do cache
+        - max_bytes (int): Tamanho máximo do cache em disco
+    """
+
+    def __init__(self, pasta: str = "data/cache/queries", max_bytes: int = 256 * 1024 ** 2):
+        self.pasta = pasta
+        self.max_bytes = max_bytes
+        self._build_id = None
+        self._bytes = 0
+
+    def path(self, sql: str, params: list, build_id: str):
+        """
+        Arquivo do resultado da consulta no build.
+        """
+        chave = hashlib.sha256(
+            json.dumps([normalize_sql(sql), params], default=str, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.pasta, build_id, f"{chave}.arrow")
+
+    def get(self, sql: str, params: list, build_id: str):
+        """
+        Resultado guardado (pd.DataFrame) ou None se não estiver no cache.
+        """
+        path = self.path(sql, params, build_id)
+        try:
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+            os.utime(path)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        return table.to_pandas()
+
+    def put(self, sql: str, params: list, build_id: str, result: pd.DataFrame):
+        """
+        Grava o resultado. Na troca de build apaga os builds anteriores; o
+        limite de bytes só é aplicado quando a gravação passa dele.
+        """
+        path = self.path(sql, params, build_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if build_id != self._build_id:
+            self.invalidate(build_id)
+            self._build_id = build_id
+            self._bytes = self.size()
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            self._bytes += sink.tell()
+        os.replace(tmp, path)
+        if self._bytes > self.max_bytes:
+            self._bytes = self.evict()
+
+    def invalidate(self, build_id: str):
+        """
+        Apaga as pastas dos builds anteriores a 'build_id'.
+        """
+        for name in os.listdir(self.pasta):
+            if build_order(name) < build_order(build_id):
+                shutil.rmtree(os.path.join(self.pasta, name), ignore_errors=True)
+
+    def _files(self):
+        files = []
+        for root, _, names in os.walk(self.pasta):
+            for name in names:
+                if name.endswith(".arrow"):
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime_ns, stat.st_size, os.path.join(root, name)))
+        return files
+
+    def size(self):
+        """
+        Bytes dos resultados guardados na pasta.
+        """
+        return sum(size for _, size, _ in self._files())
+
+    def evict(self):
+        """
+        Remove os arquivos usados há mais tempo até o cache caber em
+        'max_bytes' e retorna os bytes que ficaram.
+        """
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
@@ -0,0 +1,102 @@
+"""
+Conexões somente leitura com o warehouse, compartilhadas pelas sessões do
+dashboard.
+
+O processo mantém uma única conexão read_only com a cópia publicada do
+banco (data/published/current.json, gravado por src/load/publish.py) e
+cada thread consulta pelo seu próprio cursor, criado a partir dela: abrir
+um cursor não relê o catálogo e as sessões não disputam a mesma conexão.
+
+A cada consulta o ponteiro é conferido (um stat). Quando a publicação
+troca de arquivo, a próxima consulta abre a conexão com a cópia nova e as
+threads passam a usar cursores dela; consultas em andamento terminam na
+cópia anterior, cuja conexão só é fechada na troca seguinte (como o
+publish.py, que mantém a cópia atual e a anterior). Como o dashboard nunca abre o arquivo em que a ingestão e
+o dbt escrevem, as leituras não esperam por eles.
+
+Sem nada publicado, cada consulta abre o data/database.duckdb em modo
+somente leitura e fecha a conexão ao terminar: uma conexão mantida aberta
+seguraria o lock do arquivo e a ingestão, o dbt e o próprio publish.py não
+conseguiriam escrever nele.
+"""
+import json
+import os
+import threading
+
+import duckdb
+
+
+class ReadOnlyPool:
+    """
+    Conexão read_only com a cópia publicada do warehouse e um cursor por thread.
+
+    Args:
+        - pasta (str): Pasta das cópias publicadas (com current.json)
+        - fallback (str): Banco lido enquanto nada foi publicado
+    """
+
+    def __init__(self, pasta: str = "data/published", fallback: str = "data/database.duckdb"):
+        self.pointer = os.path.join(pasta, "current.json")
+        self.pasta = pasta
+        self.fallback = fallback
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pointer_mtime = None
+        self._published = (None, fallback)
+        self._conn = None
+        self._previous = None
+        self._path = None
+        self._generation = 0
+
+    def published(self):
+        """
+        (build_id, caminho) da cópia publicada; o ponteiro só é relido
+        quando o arquivo muda. Sem publicação, o build_id vem do mtime do
+        banco lido e do seu WAL.
+        """
+        try:
+            mtime = os.stat(self.pointer).st_mtime_ns
+        except FileNotFoundError:
+            mtimes = [os.stat(path).st_mtime_ns for path in (self.fallback, f"{self.fallback}.wal") if os.path.exists(path)]
+            return (f"local-{max(mtimes)}" if mtimes else "local"), self.fallback
+        if mtime != self._pointer_mtime:
+            with open(self.pointer, encoding="utf-8") as f:
+                current = json.load(f)
+            self._published = (current['build_id'], os.path.join(self.pasta, current['arquivo']))
+            self._pointer_mtime = mtime
+        return self._published
+
+    def cursor(self):
+        """
+        Cursor da thread atual sobre a cópia publicada mais recente. Sem
+        nada publicado, use query(), que não mantém o banco aberto.
+        """
+        _, path = self.published()
+        if path == self.fallback:
+            raise RuntimeError("Nenhuma cópia publicada: use query() para ler o banco sem mantê-lo aberto.")
+        if path != self._path:
+            with self._lock:
+                if path != self._path:
+                    if self._previous is not None:
+                        self._previous.close()
+                    self._previous = self._conn
+                    self._conn = duckdb.connect(path, read_only=True)
+                    self._path = path
+                    self._generation += 1
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            with self._lock:
+                local.cursor = self._conn.cursor()
+                local.generation = self._generation
+        return local.cursor
+
+    def query(self, sql: str, params: list = None):
+        """
+        Executa uma consulta no cursor da thread e retorna um pd.DataFrame.
+        Sem nada publicado, usa uma conexão só para a consulta.
+        """
+        _, path = self.published()
+        if path == self.fallback:
+            with duckdb.connect(path, read_only=True) as conn:
+                return conn.execute(sql, params).fetchdf()
+        return self.cursor().execute(sql, params).fetchdf()
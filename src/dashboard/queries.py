@@ -0,0 +1,90 @@
+"""
+SQL parametrizado para cada elemento do dashboard a partir dos filtros da
+barra lateral. Cada função retorna (sql, parâmetros) e o resultado já vem
+agregado no DuckDB: linhas do cubo (agg_imoveis), dos sketches
+(sketch_imoveis) ou a série em faixas do histograma de preços, nunca os
+anúncios. Os valores dos filtros vão sempre como parâmetros.
+
+Os filtros seguem as dimensões do cubo ('date_ref', 'tipo', 'localizacao',
+'secretaria_regional', 'faixa_preco'), com 'Todos' para dimensão sem filtro.
+"""
+from utils import CUBE_DIMENSIONS
+
+SKETCH_COLUMNS = CUBE_DIMENSIONS + ['metrica', 'bucket', 'valor', 'qtd']
+
+
+def cube_where(filters: dict, by: list = [], locations: list = []):
+    """
+    Condição do cubo equivalente a utils.filter_cube: dimensões em 'by' sem
+    filtro ficam diferentes de 'Todos', as demais iguais ao filtro. Com
+    'locations', traz as linhas de cada um desses bairros.
+    """
+    conditions, params = [], []
+    for dimension in CUBE_DIMENSIONS:
+        value = filters.get(dimension, 'Todos')
+        if dimension == 'localizacao' and locations:
+            conditions.append(f"localizacao IN ({', '.join('?' for _ in locations)})")
+            params += list(locations)
+        elif dimension in by and value == 'Todos':
+            conditions.append(f"{dimension} <> 'Todos'")
+        else:
+            conditions.append(f"{dimension} = ?")
+            params.append(value)
+    return " AND ".join(conditions), params
+
+def cube_query(filters: dict, by: list = [], locations: list = []):
+    """
+    Linhas do cubo agg_imoveis para os filtros, agrupadas por 'by'.
+    """
+    where, params = cube_where(filters, by, locations)
+    return f"SELECT * FROM main_gold.agg_imoveis WHERE {where}", params
+
+def options_query(dimension: str):
+    """
+    Valores de uma dimensão para as opções da barra lateral.
+    """
+    where, params = cube_where({}, [dimension])
+    return f"SELECT {dimension} FROM main_gold.agg_imoveis WHERE {where} ORDER BY 1", params
+
+def sketch_query(filters: dict, locations: list):
+    """
+    Buckets dos sketches de quantis dos bairros em 'locations', com os
+    demais filtros aplicados.
+    """
+    conditions = [f"localizacao IN ({', '.join('?' for _ in locations)})"]
+    params = list(locations)
+    for dimension in CUBE_DIMENSIONS:
+        value = filters.get(dimension, 'Todos')
+        if dimension != 'localizacao' and value != 'Todos':
+            conditions.append(f"{dimension} = ?")
+            params.append(value)
+    return f"SELECT {', '.join(SKETCH_COLUMNS)} FROM main_gold.sketch_imoveis WHERE {' AND '.join(conditions)}", params
+
+def histogram_query(filters: dict, locations: list = [], max_price: float = 1_000_000, bin_width: float = 20_000):
+    """
+    Distribuição dos preços até 'max_price' em faixas de 'bin_width', por
+    tipo: uma linha por (tipo, faixa) com o percentual dos anúncios do
+    tipo, como o histnorm='percent' do Plotly.
+    """
+    conditions, params = ["preco <= ?"], [max_price]
+    for dimension in ['tipo', 'secretaria_regional', 'faixa_preco']:
+        if filters.get(dimension, 'Todos') != 'Todos':
+            conditions.append(f"{dimension} = ?")
+            params.append(filters[dimension])
+    if locations:
+        conditions.append(f"localizacao IN ({', '.join('?' for _ in locations)})")
+        params += list(locations)
+    sql = f"""
+        SELECT
+            tipo,
+            faixa * ? AS preco,
+            COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (PARTITION BY tipo) AS percentual
+        FROM (
+            SELECT tipo, FLOOR(preco / ?) AS faixa
+            FROM main_gold.obt_imoveis
+            WHERE {' AND '.join(conditions)}
+        )
+        GROUP BY tipo, faixa
+        ORDER BY tipo, faixa
+    """
+    return sql, [bin_width, bin_width] + params
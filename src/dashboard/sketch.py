@@ -0,0 +1,43 @@
+"""
+Quantis a partir dos sketches mescláveis da gold (sketch_imoveis).
+
+Cada linha do sketch é um bucket logarítmico (DDSketch): o bucket k reúne
+os valores em (gamma^(k-1), gamma^k], com gamma = (1 + alpha) / (1 - alpha),
+e guarda a contagem e o valor representativo 2 * gamma^k / (gamma + 1).
+Mesclar sketches de bairros, tipos ou meses diferentes é somar as contagens
+de cada bucket, então qualquer combinação de filtros sai de poucas linhas.
+
+Erro: o quantil q retornado está a no máximo alpha (var sketch_alpha do
+dbt, 1% por padrão) de erro relativo do elemento de posição q * (n - 1)
+dos valores ordenados. A mesma mescla existe em SQL na macro
+mesclar_sketch do dbt.
+"""
+import pandas as pd
+
+
+def merge(sketches: pd.DataFrame, by: list = []):
+    """
+    Mescla os sketches somando as contagens de cada bucket por grupo.
+    """
+    return sketches.groupby(list(by) + ['bucket'], as_index=False).agg(
+        valor=('valor', 'first'),
+        qtd=('qtd', 'sum')
+    )
+
+def quantiles(sketches: pd.DataFrame, qs: list = [0.5], by: list = []):
+    """
+    Calcula os quantis 'qs' da mescla dos sketches, por grupo. Retorna as
+    colunas de 'by', qtd_imoveis e uma coluna q<percentil> por quantil
+    (ex: q50 para a mediana).
+    """
+    merged = merge(sketches, by).sort_values(list(by) + ['bucket'])
+    groups = merged.groupby(list(by) or (lambda _: 'Todos'))
+    merged['acumulado'] = groups['qtd'].cumsum()
+    merged['total'] = groups['qtd'].transform('sum')
+
+    result = groups['qtd'].sum().rename('qtd_imoveis').to_frame()
+    for q in qs:
+        hit = merged[merged['acumulado'] > q * (merged['total'] - 1)]
+        hit_groups = hit.groupby(list(by) or (lambda _: 'Todos'))
+        result[f"q{int(q * 100)}"] = hit_groups['valor'].first()
+    return result.reset_index(drop=not by)
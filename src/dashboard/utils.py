@@ -1,6 +1,8 @@
 import pandas as pd
 import plotly.express as px
 
+import sketch
+
 
 def format_currency(value):
     """
@@ -78,4 +80,60 @@ def plot_pie(data: pd.DataFrame,
     fig.update_traces(textinfo='percent+label')
     fig.update_layout(plot_bgcolor='rgba(0, 0, 0, 0)')
     
-    return fig
\ No newline at end of file
+    return fig
+
+CUBE_DIMENSIONS = ['date_ref', 'tipo', 'localizacao', 'secretaria_regional', 'faixa_preco']
+
+def filter_cube(cube: pd.DataFrame, filters: dict, by: list = []):
+    """
+    Seleciona as linhas do cubo pré-agregado (gold agg_imoveis) para os
+    filtros informados, agrupadas pelas dimensões em 'by'.
+    Dimensões sem filtro nem agrupamento ficam no valor 'Todos'.
+    """
+    mask = pd.Series(True, index=cube.index)
+    for dimension in CUBE_DIMENSIONS:
+        value = filters.get(dimension, 'Todos')
+        if dimension in by and value == 'Todos':
+            mask &= cube[dimension] != 'Todos'
+        else:
+            mask &= cube[dimension] == value
+    return cube[mask].reset_index(drop=True)
+
+def combine_locations(cube: pd.DataFrame, sketches: pd.DataFrame, filters: dict, locations: list, by: list = []):
+    """
+    Estatísticas de vários bairros juntos: contagens, médias, mínimo e
+    máximo vêm das linhas do cubo de cada bairro e os quartis e medianas
+    da mescla dos sketches (sketch_imoveis), sem ler os anúncios.
+    O desvio padrão não é combinável e fica vazio.
+    """
+    rows = pd.concat([filter_cube(cube, {**filters, 'localizacao': location}, by) for location in locations])
+    rows = rows.assign(
+        soma=rows['preco_medio'] * rows['qtd_imoveis'],
+        soma_m2=rows['preco_m2_medio'] * rows['qtd_imoveis']
+    )
+    result = rows.groupby(list(by) or (lambda _: 'Todos')).agg(
+        qtd_imoveis=('qtd_imoveis', 'sum'),
+        soma=('soma', 'sum'),
+        soma_m2=('soma_m2', 'sum'),
+        preco_min=('preco_min', 'min'),
+        preco_max=('preco_max', 'max')
+    )
+    result['preco_medio'] = (result.pop('soma') / result['qtd_imoveis']).round(2)
+    result['preco_m2_medio'] = (result.pop('soma_m2') / result['qtd_imoveis']).round(2)
+    result['preco_desvio'] = float('nan')
+
+    selected = sketches[sketches['localizacao'].isin(locations)]
+    for dimension, value in filters.items():
+        if dimension != 'localizacao' and value != 'Todos':
+            selected = selected[selected[dimension] == value]
+    precos = sketch.quantiles(selected[selected['metrica'] == 'preco'], [0.25, 0.5, 0.75], by)
+    precos_m2 = sketch.quantiles(selected[selected['metrica'] == 'preco_m2'], [0.5], by)
+    result = result.reset_index(drop=not by)
+    if by:
+        precos, precos_m2 = precos.set_index(by), precos_m2.set_index(by)
+        result = result.set_index(by)
+    result['preco_q1'] = precos['q25']
+    result['preco_mediano'] = precos['q50']
+    result['preco_q3'] = precos['q75']
+    result['preco_m2_mediano'] = precos_m2['q50']
+    return result.reset_index(drop=not by)
@@ -0,0 +1,264 @@
+"""
+Arquivo de respostas por mês de raspagem, para gravar e reprocessar crawls.
+
+O arquivo de cada mês ('mai-2025', 'jun-2025', ...) fica em
+ARCHIVE_DIR/<mês>/ com:
+    - objects/<ab>/<sha256>.gz: corpos das respostas, comprimidos e
+      endereçados pelo conteúdo (páginas iguais são gravadas uma única vez)
+    - <spider>.jsonl: índice fingerprint da requisição -> metadados da resposta
+
+O arquivo fica antes do HttpCompressionMiddleware, então os corpos são
+gravados como vieram da rede (gzip, br, ...); archived_bodies decodifica
+pelo Content-Encoding guardado no índice.
+
+Uso (a partir de src/):
+    scrapy crawl zap -s ARCHIVE_MODE=record -s ARCHIVE_MONTH=jul-2025 -O ../data/raw/jul-2025/zap.json
+    python -m extract.archive jun-2025 --saida ../data/replay/jun-2025
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+
+# Opcionais, como no HttpCompressionMiddleware: sem eles, corpos 'br' e
+# 'zstd' não são decodificados
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseArchive:
+    """
+    Storage do HttpCacheMiddleware que grava/lê o arquivo do mês.
+
+    Em ARCHIVE_MODE='record' toda requisição vai à rede e a resposta é
+    arquivada; em 'replay' as respostas vêm somente do arquivo.
+    """
+
+    def __init__(self, settings):
+        self.mode = settings.get("ARCHIVE_MODE")
+        self.root = os.path.join(settings.get("ARCHIVE_DIR"), settings.get("ARCHIVE_MONTH"))
+        self.index = {}
+        self._index_file = None
+
+    def open_spider(self, spider):
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        path = os.path.join(self.root, f"{spider.name}.jsonl")
+        self.index = read_index(path)
+        if self.mode == "record":
+            os.makedirs(self.root, exist_ok=True)
+            self._index_file = open(path, "a", encoding="utf-8")
+        logger.info(f"Arquivo de respostas '{path}' ({self.mode}): {len(self.index)} respostas.")
+
+    def close_spider(self, spider):
+        if self._index_file:
+            self._index_file.close()
+            self._index_file = None
+
+    def retrieve_response(self, spider, request):
+        if self.mode != "replay":
+            return None
+        entry = self.index.get(self._fingerprinter.fingerprint(request).hex())
+        if entry is None:
+            return None
+        body = read_object(self.root, entry['body'])
+        headers = Headers({k.encode("latin-1"): [v.encode("latin-1") for v in vs]
+                           for k, vs in entry['headers'].items()})
+        url = entry['response_url']
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=entry['status'], body=body)
+
+    def store_response(self, spider, request, response):
+        if self.mode != "record":
+            return
+        fingerprint = self._fingerprinter.fingerprint(request).hex()
+        entry = {
+            'fingerprint': fingerprint,
+            'url': request.url,
+            'method': request.method,
+            'status': response.status,
+            'response_url': response.url,
+            'headers': {k.decode("latin-1"): [v.decode("latin-1") for v in vs]
+                        for k, vs in response.headers.items()},
+            'body': write_object(self.root, response.body),
+            'timestamp': time.time(),
+        }
+        self.index[fingerprint] = entry
+        self._index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._index_file.flush()
+
+
+def read_index(path: str):
+    """
+    Lê o índice de uma spider; entradas repetidas ficam com a mais recente.
+
+    Args:
+        - path (str): Caminho do arquivo <spider>.jsonl
+    """
+    index = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                index[entry['fingerprint']] = entry
+    return index
+
+
+def write_object(root: str, body: bytes):
+    """
+    Grava o corpo comprimido, endereçado pelo seu SHA256, e retorna o hash.
+
+    Args:
+        - root (str): Pasta do arquivo do mês
+        - body (bytes): Corpo da resposta
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    path = os.path.join(root, "objects", digest[:2], f"{digest}.gz")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with gzip.open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+    return digest
+
+
+def read_object(root: str, digest: str):
+    """
+    Lê o corpo de uma resposta arquivada.
+
+    Args:
+        - root (str): Pasta do arquivo do mês
+        - digest (str): SHA256 do corpo
+    """
+    with gzip.open(os.path.join(root, "objects", digest[:2], f"{digest}.gz"), "rb") as f:
+        return f.read()
+
+
+def _inflate(body: bytes):
+    # 'deflate' vem com o cabeçalho zlib ou, em alguns servidores, sem ele
+    try:
+        return zlib.decompress(body)
+    except zlib.error:
+        return zlib.decompress(body, -zlib.MAX_WBITS)
+
+
+def _unbrotli(body: bytes):
+    if brotli is None:
+        raise ValueError("Content-Encoding 'br' exige o pacote brotli.")
+    return brotli.decompress(body)
+
+
+def _unzstd(body: bytes):
+    if zstandard is None:
+        raise ValueError("Content-Encoding 'zstd' exige o pacote zstandard.")
+    # decompressobj aceita frames sem o tamanho do conteúdo no cabeçalho
+    return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+
+def decode_body(body: bytes, headers: dict):
+    """
+    Desfaz o Content-Encoding de um corpo arquivado, na ordem inversa da
+    aplicada pelo servidor.
+
+    Args:
+        - body (bytes): Corpo como veio da rede
+        - headers (dict): Cabeçalhos da entrada do índice
+    """
+    decoders = {'gzip': gzip.decompress, 'x-gzip': gzip.decompress, 'deflate': _inflate,
+                'br': _unbrotli, 'zstd': _unzstd}
+    values = [v for k, vs in headers.items() if k.lower() == "content-encoding" for v in vs]
+    encodings = [e.strip().lower() for value in values for e in value.split(",") if e.strip()]
+    for encoding in reversed(encodings):
+        if encoding == "identity":
+            continue
+        if encoding not in decoders:
+            raise ValueError(f"Content-Encoding não suportado: '{encoding}'.")
+        body = decoders[encoding](body)
+    return body
+
+
+def archived_bodies(archive_dir: str, month: str, spider_name: str):
+    """
+    Retorna os corpos (já decodificados) de todas as respostas 200
+    arquivadas de uma spider.
+
+    Args:
+        - archive_dir (str): Pasta raiz dos arquivos (ARCHIVE_DIR)
+        - month (str): Mês da raspagem ('jun-2025')
+        - spider_name (str): Nome da spider
+    """
+    root = os.path.join(archive_dir, month)
+    index = read_index(os.path.join(root, f"{spider_name}.jsonl"))
+    return [decode_body(read_object(root, entry['body']), entry['headers'])
+            for entry in index.values() if entry['status'] == 200]
+
+
+class ArchiveAddon:
+    """
+    Add-on que liga o arquivo de respostas conforme ARCHIVE_MODE.
+
+    Em 'replay' também remove o delay e amplia a concorrência, já que
+    nenhuma requisição chega à rede.
+    """
+
+    def update_settings(self, settings):
+        mode = settings.get("ARCHIVE_MODE")
+        if not mode:
+            raise NotConfigured
+        if mode not in ("record", "replay"):
+            raise NotConfigured(f"ARCHIVE_MODE inválido: '{mode}' (use 'record' ou 'replay').")
+        if not settings.get("ARCHIVE_MONTH"):
+            raise NotConfigured("ARCHIVE_MONTH não informado (ex: 'jun-2025').")
+
+        settings.set("HTTPCACHE_ENABLED", True, "project")
+        settings.set("HTTPCACHE_STORAGE", "extract.archive.ResponseArchive", "project")
+        settings.set("HTTPCACHE_POLICY", "scrapy.extensions.httpcache.DummyPolicy", "project")
+        if mode == "replay":
+            settings.set("HTTPCACHE_IGNORE_MISSING", True, "project")
+            settings.set("DOWNLOAD_DELAY", 0, "project")
+            settings.set("CONCURRENT_REQUESTS", 64, "project")
+            settings.set("CONCURRENT_REQUESTS_PER_DOMAIN", 64, "project")
+            settings.set("AUTOTHROTTLE_ENABLED", False, "project")
+
+
+def main():
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    parser = argparse.ArgumentParser(description="Reprocessa um mês arquivado sem acessar a rede.")
+    parser.add_argument("mes", help="Mês arquivado, ex: 'jun-2025'")
+    parser.add_argument("--saida", required=True, help="Pasta onde gravar os feeds <spider>.json")
+    parser.add_argument("--spider", action="append", help="Spider a reprocessar (padrão: todas)")
+    args = parser.parse_args()
+
+    settings = get_project_settings()
+    settings.set("ARCHIVE_MODE", "replay", "cmdline")
+    settings.set("ARCHIVE_MONTH", args.mes, "cmdline")
+    settings.set("FEEDS", {os.path.join(args.saida, "%(name)s.json"): {'format': 'json'}}, "cmdline")
+
+    process = CrawlerProcess(settings)
+    for name in args.spider or process.spider_loader.list():
+        process.crawl(name)
+    inicio = time.perf_counter()
+    process.start()
+    logger.info(f"Reprocessamento de '{args.mes}' concluído em {time.perf_counter() - inicio:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
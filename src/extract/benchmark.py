@@ -0,0 +1,125 @@
+"""
+Benchmark de throughput do parse das spiders sobre fixtures HTML salvas.
+
+Uso (a partir de src/):
+    python -m extract.benchmark
+    python -m extract.benchmark --spider zap --iteracoes 500
+    python -m extract.benchmark --archive jun-2025 --iteracoes 5
+"""
+import argparse
+import glob
+import logging
+import os
+import time
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+
+from extract.archive import archived_bodies
+from extract.spiders.chaves import ChavesSpider
+from extract.spiders.vivareal import VivarealSpider
+from extract.spiders.zap import ZapSpider
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+SPIDERS = {spider.name: spider for spider in (ChavesSpider, VivarealSpider, ZapSpider)}
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "archive")
+
+
+def load_fixtures(spider_name: str, fixtures_dir: str = FIXTURES_DIR):
+    """
+    Lê as páginas HTML salvas de uma spider ('<spider>*.html').
+
+    Args:
+        - spider_name (str): Nome da spider
+        - fixtures_dir (str): Pasta com as fixtures
+    """
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, f"{spider_name}*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def make_response(spider_cls, body: bytes):
+    """
+    Monta uma resposta como a que o Scrapy entregaria ao parse da spider.
+
+    Args:
+        - spider_cls (type): Classe da spider
+        - body (bytes): Conteúdo HTML da página
+    """
+    url = f"https://{spider_cls.allowed_domains[0]}/"
+    tipo = next(iter(spider_cls.tipos))
+    request = Request(url=url, meta={'tipo': tipo, 'page': 1})
+    return HtmlResponse(url=url, body=body, encoding="utf-8", request=request)
+
+
+def bench_spider(spider_cls, pages: list, iteracoes: int):
+    """
+    Executa o parse da spider sobre as páginas e mede o throughput.
+
+    Cada iteração cria uma nova resposta, de modo que o parse do HTML
+    entra na medição assim como acontece durante a raspagem.
+
+    Args:
+        - spider_cls (type): Classe da spider
+        - pages (list): Corpos HTML das fixtures
+        - iteracoes (int): Quantidade de passagens sobre as fixtures
+    """
+    spider = spider_cls()
+    cards = 0
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        for body in pages:
+            for result in spider.parse(make_response(spider_cls, body)):
+                if not isinstance(result, Request):
+                    cards += 1
+    duracao = time.perf_counter() - inicio
+    return {
+        'spider': spider_cls.name,
+        'paginas': iteracoes * len(pages),
+        'cards': cards,
+        'segundos': duracao,
+        'cards_por_segundo': cards / duracao if duracao else 0.0,
+        'us_por_card': duracao / cards * 1e6 if cards else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parse das spiders.")
+    parser.add_argument("--spider", choices=sorted(SPIDERS), action="append",
+                        help="Spider a medir (padrão: todas)")
+    parser.add_argument("--iteracoes", type=int, default=200,
+                        help="Passagens sobre as fixtures de cada spider")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR,
+                        help="Pasta com as páginas HTML salvas")
+    parser.add_argument("--archive", metavar="MES",
+                        help="Usa as páginas do arquivo de respostas do mês (ex: 'jun-2025')")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR,
+                        help="Pasta raiz dos arquivos de respostas")
+    args = parser.parse_args()
+
+    for name in args.spider or sorted(SPIDERS):
+        if args.archive:
+            pages = archived_bodies(args.archive_dir, args.archive, name)
+        else:
+            pages = load_fixtures(name, args.fixtures)
+        if not pages:
+            logging.warning(f"Nenhuma fixture encontrada para '{name}'.")
+            continue
+
+        result = bench_spider(SPIDERS[name], pages, args.iteracoes)
+        logging.info(
+            f"{result['spider']}: {result['cards']} cards em {result['paginas']} páginas | "
+            f"{result['cards_por_segundo']:,.0f} cards/s | {result['us_por_card']:.1f} µs/card"
+        )
+
+
+if __name__ == "__main__":
+    main()
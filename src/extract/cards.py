@@ -0,0 +1,42 @@
+from lxml import etree
+from parsel.csstranslator import css2xpath
+
+
+def compile_css(query: str) -> etree.XPath:
+    """
+    Traduz um seletor CSS (com suporte a ::text e ::attr) para um XPath
+    compilado do lxml, evitando a tradução a cada chamada de .css().
+
+    Args:
+        - query (str): Seletor CSS no formato aceito pelo Scrapy/parsel
+    """
+    return etree.XPath(css2xpath(query), smart_strings=False)
+
+
+class CardExtractor:
+    """
+    Extrator de cards de anúncios com seletores pré-compilados.
+
+    Deve ser instanciado uma única vez por spider (atributo de classe). Cada
+    chamada a extract() percorre os cards da página uma única vez e aplica
+    todos os seletores de campo sobre o card, retornando as listas de textos.
+
+    Args:
+        - card (str): Seletor CSS dos cards na página
+        - fields (dict): Nome do campo -> seletor CSS relativo ao card
+    """
+
+    def __init__(self, card: str, fields: dict):
+        self.card = compile_css(card)
+        self.fields = tuple((name, compile_css(query)) for name, query in fields.items())
+
+    def extract(self, response):
+        """
+        Gera um dicionário {campo: [textos]} para cada card da resposta.
+
+        Args:
+            - response (scrapy.http.HtmlResponse): Página de listagem
+        """
+        fields = self.fields
+        for card in self.card(response.selector.root):
+            yield {name: xpath(card) for name, xpath in fields}
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+import unicodedata
+
+import numpy as np
+from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem, NotConfigured
+
+from extract.incremental import listing_id
+from extract.normalize import parse_currency, parse_location, parse_range
+
+logger = logging.getLogger(__name__)
+
+MERSENNE = (1 << 31) - 1
+
+
+class BloomFilter:
+    """
+    Conjunto probabilístico de chaves: sem falsos negativos e com taxa de
+    falsos positivos 'error_rate' até 'capacity' chaves.
+
+    Args:
+        - capacity (int): Quantidade de chaves prevista
+        - error_rate (float): Taxa de falsos positivos aceita
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        """
+        Adiciona a chave e informa se ela (provavelmente) já estava no conjunto.
+        """
+        seen = True
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                seen = False
+                self.bits[byte] |= 1 << bit
+        return seen
+
+
+def fold(text):
+    """
+    Texto em minúsculas e sem acentos, para comparar bairros entre portais.
+    """
+    text = unicodedata.normalize("NFKD", str(text).strip().lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def typed_item(item):
+    """
+    Item com os campos comparados já tipados. Itens de feeds antigos, com os
+    textos do card, passam pelas regras de extract.normalize.
+
+    Args:
+        - item: Item emitido pela spider ou lido de um feed .JSON
+    """
+    adapter = ItemAdapter(item)
+    if not any(isinstance(adapter.get(field), str) for field in ('area', 'quartos', 'banheiros', 'vagas', 'preco')):
+        return item
+    values = {'tipo': adapter.get('tipo'), 'localizacao': parse_location(adapter.get('localizacao'))}
+    for field in ('area', 'quartos', 'banheiros', 'vagas'):
+        value = adapter.get(field)
+        values[field] = parse_range(value)[0] if isinstance(value, str) else value
+    preco = adapter.get('preco')
+    values['preco'] = parse_currency(preco) if isinstance(preco, str) else preco
+    return values
+
+
+def listing_tokens(item):
+    """
+    Atributos normalizados de um anúncio para a comparação MinHash. Área e
+    preço entram em faixas deslocadas (10 m² e ~5%), para que pequenas
+    diferenças entre portais mantenham a maior parte dos tokens.
+
+    Args:
+        - item: Item emitido pela spider
+    """
+    adapter = ItemAdapter(typed_item(item))
+    tokens = {f"tipo:{fold(adapter.get('tipo'))}"}
+    if adapter.get('localizacao'):
+        tokens.add(f"bairro:{fold(adapter.get('localizacao'))}")
+    for field in ('quartos', 'banheiros', 'vagas'):
+        if adapter.get(field) is not None:
+            tokens.add(f"{field}:{adapter.get(field)}")
+    area = adapter.get('area')
+    if area:
+        tokens.add(f"area:{area // 10}")
+        tokens.add(f"area+:{(area + 5) // 10}")
+    preco = adapter.get('preco')
+    if preco:
+        bucket = math.log(preco) / math.log(1.05)
+        tokens.add(f"preco:{math.floor(bucket)}")
+        tokens.add(f"preco+:{math.floor(bucket + 0.5)}")
+    return tokens
+
+
+class MinHashLSH:
+    """
+    Índice MinHash/LSH para encontrar anúncios quase iguais.
+
+    A assinatura tem bands * rows funções de hash; dois anúncios viram
+    candidatos quando coincidem em todas as linhas de alguma banda, e são
+    confirmados quando a similaridade de Jaccard estimada pelas assinaturas
+    é ao menos 'threshold'.
+
+    Args:
+        - bands (int): Quantidade de bandas do LSH
+        - rows (int): Linhas (funções de hash) por banda
+        - threshold (float): Similaridade mínima para considerar duplicata
+        - seed (int): Semente das funções de hash, igual em todas as spiders
+    """
+
+    def __init__(self, bands: int = 8, rows: int = 8, threshold: float = 0.7, seed: int = 42):
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        permutations = bands * rows
+        self.a = rng.integers(1, MERSENNE, permutations, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE, permutations, dtype=np.uint64)
+        self.ids = []
+        self.signatures = []
+        self.buckets = {}
+
+    def signature(self, tokens: set):
+        """
+        Assinatura MinHash (uint32) de um conjunto de tokens.
+        """
+        values = np.array(
+            [int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+             for token in tokens],
+            dtype=np.uint64,
+        )
+        hashed = (np.outer(values, self.a) + self.b) % MERSENNE
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def _keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def add(self, key: str, signature):
+        index = len(self.ids)
+        self.ids.append(key)
+        self.signatures.append(signature)
+        for bucket in self._keys(signature):
+            self.buckets.setdefault(bucket, []).append(index)
+
+    def query(self, signature):
+        """
+        Retorna a chave do anúncio indexado mais parecido acima do limiar, ou None.
+        """
+        candidates = {index for bucket in self._keys(signature) for index in self.buckets.get(bucket, ())}
+        best, best_score = None, self.threshold
+        for index in candidates:
+            score = float(np.mean(self.signatures[index] == signature))
+            if score >= best_score:
+                best, best_score = self.ids[index], score
+        return best
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        signatures = np.array(self.signatures, dtype=np.uint32).reshape(-1, self.bands * self.rows)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, ids=np.array(self.ids, dtype=str), signatures=signatures)
+
+    def load(self, path: str):
+        with np.load(path) as data:
+            for key, signature in zip(data['ids'], data['signatures']):
+                self.add(str(key), signature)
+
+
+class DedupPipeline:
+    """
+    Remove duplicatas antes da gravação dos itens.
+
+    - Exatas: anúncios com a mesma chave (campos do id da silver) já vistos
+      nesta raspagem são descartados, com um filtro de Bloom.
+    - Quase iguais entre portais: a spider carrega os índices MinHash/LSH que
+      as spiders de outros portais gravaram para o mesmo mês (DATE_REF) em
+      DEDUP_DIR. Um anúncio parecido com algum deles é descartado
+      (DEDUP_MODE='drop') ou marcado com a chave do outro em 'duplicata_de'
+      (DEDUP_MODE='link'). Ao fim, grava o índice do próprio portal.
+
+    Os índices só são lidos na abertura da spider, então a comparação entre
+    portais supõe raspagens em sequência. Com DEDUP_CROSS_PORTAL=False fica
+    só a etapa exata; spiders que rodam ao mesmo tempo (src/load/pipeline.py)
+    comparam os portais depois, com FeedLinker.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.stats = crawler.stats
+        self.mode = settings.get("DEDUP_MODE")
+        self.dir = settings.get("DEDUP_DIR")
+        self.date_ref = settings.get("DATE_REF") or time.strftime("%Y-%m")
+        self.seen = BloomFilter(settings.getint("DEDUP_CAPACITY"), settings.getfloat("DEDUP_ERROR_RATE"))
+        self.threshold = settings.getfloat("DEDUP_THRESHOLD")
+        self.cross_portal = settings.getbool("DEDUP_CROSS_PORTAL")
+        self.others = MinHashLSH(threshold=self.threshold)
+        self.own = MinHashLSH(threshold=self.threshold)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("DEDUP_ENABLED"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def _index_path(self, spider_name):
+        return os.path.join(self.dir, self.date_ref, f"{spider_name}.npz")
+
+    def open_spider(self, spider):
+        folder = os.path.join(self.dir, self.date_ref)
+        if not self.cross_portal or not os.path.isdir(folder):
+            return
+        for file in sorted(os.listdir(folder)):
+            if file.endswith(".npz") and file != f"{spider.name}.npz":
+                self.others.load(os.path.join(folder, file))
+        logger.info(f"Deduplicação: {len(self.others.ids)} anúncios de outros portais em '{folder}'.")
+
+    def close_spider(self, spider):
+        self.own.save(self._index_path(spider.name))
+        logger.info(f"Deduplicação: índice de {len(self.own.ids)} anúncios gravado.")
+
+    def process_item(self, item, spider):
+        key = listing_id(spider.origem, item)
+        if self.seen.add(key):
+            self.stats.inc_value("dedup/exact_dropped")
+            raise DropItem(f"Anúncio repetido: {key}")
+
+        signature = self.own.signature(listing_tokens(item))
+        self.own.add(key, signature)
+        match = self.others.query(signature) if self.others.ids else None
+        if match is None:
+            return item
+        if self.mode == "drop":
+            self.stats.inc_value("dedup/near_dropped")
+            raise DropItem(f"Anúncio já raspado em outro portal: {match}")
+        self.stats.inc_value("dedup/near_linked")
+        ItemAdapter(item)['duplicata_de'] = match
+        return item
+
+
+class FeedLinker:
+    """
+    Deduplicação entre portais sobre os feeds .JSON já raspados do mês, um
+    feed por vez, na ordem de prioridade: cada anúncio é comparado com os
+    dos feeds ligados antes e recebe a chave do mais parecido em
+    'duplicata_de' (ou é descartado, com mode='drop'), como se as spiders
+    tivessem rodado em sequência. O resultado só depende dos feeds e da
+    ordem, então refazer a etapa não altera arquivos que não mudaram.
+
+    Os feeds brutos (data/raw/<mes>-<ano>/*.json) são regravados no lugar:
+    a versão da spider, sem as ligações, não é mantida. Os anúncios ligados
+    ficam na bronze e são removidos na silver_imoveis.
+
+    Args:
+        - mode (str): 'link' ou 'drop', como DEDUP_MODE
+        - threshold (float): Similaridade mínima, como DEDUP_THRESHOLD
+    """
+
+    def __init__(self, mode: str = "link", threshold: float = 0.7):
+        self.mode = mode
+        self.previous = MinHashLSH(threshold=threshold)
+
+    def link(self, origem: str, path: str):
+        """
+        Liga o feed aos feeds anteriores e o acrescenta ao índice. Retorna
+        True se o arquivo foi regravado.
+
+        Args:
+            - origem (str): Origem do portal (ex: 'ZAP')
+            - path (str): Caminho do .JSON
+        """
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        kept, own, updated = [], [], False
+        for item in items:
+            signature = self.previous.signature(listing_tokens(item))
+            own.append((listing_id(origem, item), signature))
+            match = self.previous.query(signature) if self.previous.ids else None
+            if match is not None and self.mode == "drop":
+                updated = True
+                continue
+            if item.get('duplicata_de') != match:
+                item['duplicata_de'] = match
+                updated = True
+            kept.append(item)
+        for key, signature in own:
+            self.previous.add(key, signature)
+        if updated:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                # Mesmo formato do exportador JSON do Scrapy: um item por linha
+                f.write("[\n" + ",\n".join(json.dumps(item, ensure_ascii=False) for item in kept) + "\n]")
+            os.replace(f"{path}.tmp", path)
+        logger.info(
+            f"Deduplicação entre portais: '{path}' com {sum(item.get('duplicata_de') is not None for item in kept)} "
+            f"duplicatas ligadas e {len(items) - len(kept)} descartadas."
+        )
+        return updated
+
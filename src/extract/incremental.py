@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import os
+
+from itemadapter import ItemAdapter, is_item
+from scrapy import Request, signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+ID_FIELDS = ('tipo', 'localizacao', 'area', 'quartos', 'banheiros', 'vagas', 'preco')
+
+
+def listing_id(origem: str, item) -> str:
+    """
+    Gera a chave do anúncio (SHA256 em hexadecimal da concatenação de origem,
+    tipo, localizacao, area, quartos, banheiros, vagas e preco). Usa os mesmos
+    campos do id da camada silver, mas não o mesmo formato: o id é um
+    UBIGINT calculado no dbt (macro chave_anuncio).
+
+    Args:
+        - origem (str): Site onde o anúncio foi raspado
+        - item: Item emitido pela spider
+    """
+    adapter = ItemAdapter(item)
+    values = [origem] + [adapter.get(field) for field in ID_FIELDS]
+    key = "".join("" if value is None else str(value) for value in values)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Conjunto persistente das chaves de anúncios vistos em raspagens anteriores.
+
+    Args:
+        - path (str): Arquivo texto com uma chave por linha
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.known = set()
+        self.new = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.known = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, fingerprint: str):
+        return fingerprint in self.known or fingerprint in self.new
+
+    def add(self, fingerprint: str):
+        self.new.add(fingerprint)
+
+    def save(self):
+        """
+        Acrescenta ao arquivo as chaves vistas pela primeira vez nesta raspagem.
+        """
+        if not self.new:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(f"{fingerprint}\n" for fingerprint in sorted(self.new))
+        self.known |= self.new
+        self.new = set()
+
+
+class IncrementalMiddleware:
+    """
+    Spider middleware do modo incremental.
+
+    Descarta os anúncios já conhecidos e, quando uma sequência de
+    INCREMENTAL_STOP_PAGES páginas seguidas do mesmo 'tipo' não traz nenhum
+    anúncio novo, deixa de seguir a paginação desse tipo.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.store_dir = settings.get("INCREMENTAL_DIR")
+        self.stop_pages = settings.getint("INCREMENTAL_STOP_PAGES")
+        self.store = None
+        self.streak = {}
+        self.stopped = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("INCREMENTAL_ENABLED"):
+            raise NotConfigured
+        o = cls(crawler)
+        crawler.signals.connect(o.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(o.spider_closed, signal=signals.spider_closed)
+        return o
+
+    def spider_opened(self, spider):
+        path = os.path.join(self.store_dir, f"{spider.name}.txt")
+        self.store = FingerprintStore(path)
+        logger.info(f"Modo incremental: {len(self.store.known)} anúncios conhecidos em '{path}'.")
+
+    def spider_closed(self, spider):
+        logger.info(f"Modo incremental: {len(self.store.new)} anúncios novos registrados.")
+        self.store.save()
+
+    def process_spider_output(self, response, result, spider):
+        requests = []
+        novos = 0
+        for o in result:
+            if isinstance(o, Request):
+                requests.append(o)
+            elif self._is_new(o, spider):
+                novos += 1
+                yield o
+        yield from self._follow(response, requests, novos)
+
+    async def process_spider_output_async(self, response, result, spider):
+        requests = []
+        novos = 0
+        async for o in result:
+            if isinstance(o, Request):
+                requests.append(o)
+            elif self._is_new(o, spider):
+                novos += 1
+                yield o
+        for request in self._follow(response, requests, novos):
+            yield request
+
+    def _is_new(self, item, spider):
+        if not is_item(item):
+            return True
+        fingerprint = listing_id(spider.origem, item)
+        if fingerprint in self.store:
+            self.stats.inc_value("incremental/known_items")
+            return False
+        self.store.add(fingerprint)
+        self.stats.inc_value("incremental/new_items")
+        return True
+
+    def _follow(self, response, requests, novos):
+        tipo = response.meta.get('tipo')
+        if tipo not in self.stopped:
+            self.streak[tipo] = 0 if novos else self.streak.get(tipo, 0) + 1
+            if self.streak[tipo] >= self.stop_pages:
+                self.stopped.add(tipo)
+                logger.info(
+                    f"Modo incremental: {self.streak[tipo]} páginas sem anúncios novos em "
+                    f"'{tipo}', paginação interrompida na página {response.meta.get('page')}."
+                )
+        for request in requests:
+            if request.meta.get('tipo') in self.stopped:
+                self.stats.inc_value("incremental/skipped_pages")
+                continue
+            yield request
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+
+from extract.normalize import parse_currency, parse_location, parse_range
+
+
+@dataclass(slots=True)
+class Imovel:
+    """
+    Anúncio raspado, já com os tipos do warehouse.
+
+    Campos com faixa ('48-60 m²', '2-3 quartos') guardam o mínimo no campo
+    e o máximo em '<campo>_max'; em valores simples os dois coincidem.
+    'duplicata_de' recebe a chave do mesmo anúncio em outro portal, quando
+    a deduplicação (extract.dedup) o encontra.
+    """
+
+    tipo: str
+    localizacao: str | None = None
+    area: int | None = None
+    area_max: int | None = None
+    quartos: int | None = None
+    quartos_max: int | None = None
+    banheiros: int | None = None
+    banheiros_max: int | None = None
+    vagas: int | None = None
+    vagas_max: int | None = None
+    preco: float | None = None
+    condo: float | None = None
+    duplicata_de: str | None = None
+
+    @classmethod
+    def from_texts(cls, tipo, localizacao=None, area=None, quartos=None,
+                   banheiros=None, vagas=None, preco=None, condo=None):
+        """
+        Monta o item a partir dos textos extraídos do card.
+
+        Args:
+            - tipo (str): Tipo do imóvel
+            - localizacao, area, quartos, banheiros, vagas, preco, condo (str):
+              Textos do card, como aparecem na página
+        """
+        area, area_max = parse_range(area)
+        quartos, quartos_max = parse_range(quartos)
+        banheiros, banheiros_max = parse_range(banheiros)
+        vagas, vagas_max = parse_range(vagas)
+        return cls(
+            tipo=tipo,
+            localizacao=parse_location(localizacao),
+            area=area,
+            area_max=area_max,
+            quartos=quartos,
+            quartos_max=quartos_max,
+            banheiros=banheiros,
+            banheiros_max=banheiros_max,
+            vagas=vagas,
+            vagas_max=vagas_max,
+            preco=parse_currency(preco),
+            condo=parse_currency(condo),
+        )
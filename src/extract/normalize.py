@@ -0,0 +1,208 @@
+"""
+Normalização dos textos raspados para os tipos do warehouse.
+
+- Faixas como '48-60' ou '2 a 3' viram duas colunas: mínimo (area, quartos,
+  banheiros, vagas) e máximo (<campo>_max). Valores simples repetem o
+  mínimo no máximo.
+- Moeda: 'R$ 1.200', 'Cond. R$ 850' e '1.549.000' viram números. Pontos só
+  são separadores de milhar quando agrupam três dígitos; a vírgula é o
+  separador decimal. Textos sem valor ('Valor sob consulta') viram nulos.
+  Quando o texto traz IPTU ('Cond. R$ 850 • IPTU R$ 120'), vale só o valor
+  após 'Cond.'; textos só com IPTU ('IPTU R$ 120') viram nulos.
+
+As mesmas regras existem em versão escalar, usada pelos itens das spiders,
+vetorizada sobre colunas do pyarrow, usada pelo pipeline, e em SQL do
+DuckDB, usada pela ingestão nativa dos arquivos brutos.
+"""
+import re
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+RANGE_FIELDS = ('area', 'quartos', 'banheiros', 'vagas')
+CURRENCY_FIELDS = ('preco', 'condo')
+
+SCHEMA = pa.schema(
+    [('tipo', pa.string()), ('localizacao', pa.string())]
+    + [(name, pa.int32()) for field in RANGE_FIELDS for name in (field, f"{field}_max")]
+    + [(field, pa.float64()) for field in CURRENCY_FIELDS]
+    + [('duplicata_de', pa.string())]
+)
+
+NUMBER = r"\d{1,3}(?:\.\d{3})+|\d+"
+RANGE_PATTERN = rf"^\D*?(?P<min>{NUMBER})(?:\s*(?:-|–|a|até)\s*(?P<max>{NUMBER}))?"
+CURRENCY_PATTERN = rf"(?P<valor>(?:{NUMBER})(?:,\d+)?)"
+CONDO_PATTERN = rf"(?i)cond\D*?{CURRENCY_PATTERN}"
+EXCLUDED_CURRENCY = "IPTU"
+
+# Sufixo dos Parquets gravados pelo WarehousePipeline, distinto do
+# '<arquivo>.parquet' da ingestão em lote (batch_ingestion.lake_file), que não os apaga
+PARQUET_SUFFIX = ".itens.parquet"
+
+_RANGE = re.compile(RANGE_PATTERN)
+_CURRENCY = re.compile(CURRENCY_PATTERN)
+_CONDO = re.compile(CONDO_PATTERN)
+
+
+def parse_range(text):
+    """
+    Converte um texto como '48-60' em (48, 60) e '72' em (72, 72).
+
+    Args:
+        - text (str): Texto raspado
+    """
+    match = _RANGE.match(text) if text else None
+    if not match:
+        return None, None
+    low = int(match.group('min').replace(".", ""))
+    high = match.group('max')
+    return low, int(high.replace(".", "")) if high else low
+
+
+def parse_currency(text):
+    """
+    Converte um texto como 'R$ 1.200' em 1200.0. Com IPTU no texto, usa
+    o valor após 'Cond.' ('Cond. R$ 850 • IPTU R$ 120' vira 850.0) e
+    retorna None se não houver condomínio.
+
+    Args:
+        - text (str): Texto raspado
+    """
+    if not text:
+        return None
+    pattern = _CONDO if EXCLUDED_CURRENCY in text.upper() else _CURRENCY
+    match = pattern.search(text)
+    if not match:
+        return None
+    return float(match.group('valor').replace(".", "").replace(",", "."))
+
+
+def parse_location(text):
+    """
+    Mantém apenas o bairro de textos como 'Aldeota, Fortaleza'.
+
+    Args:
+        - text (str): Texto raspado
+    """
+    if not text:
+        return None
+    return text.split(",")[0].strip() or None
+
+
+def _blank_to_null(values):
+    return pc.if_else(pc.equal(values, ""), pa.scalar(None, pa.string()), values)
+
+
+def _to_number(values, target):
+    values = pc.replace_substring(values, ".", "")
+    values = pc.replace_substring(values, ",", ".")
+    return pc.cast(_blank_to_null(values), target)
+
+
+def normalize_range(values):
+    """
+    Versão vetorizada de parse_range: retorna os arrays (mínimo, máximo).
+
+    Args:
+        - values (pa.Array): Textos raspados
+    """
+    if not pa.types.is_string(values.type):
+        values = pc.cast(values, pa.int32())
+        return values, values
+    parts = pc.extract_regex(values, RANGE_PATTERN)
+    low = _to_number(pc.struct_field(parts, 'min'), pa.int32())
+    high = _to_number(pc.struct_field(parts, 'max'), pa.int32())
+    return low, pc.coalesce(high, low)
+
+
+def normalize_currency(values):
+    """
+    Versão vetorizada de parse_currency.
+
+    Args:
+        - values (pa.Array): Textos raspados
+    """
+    if not pa.types.is_string(values.type):
+        return pc.cast(values, pa.float64())
+    excluded = pc.match_substring(values, EXCLUDED_CURRENCY, ignore_case=True)
+    value = pc.struct_field(pc.extract_regex(values, CURRENCY_PATTERN), 'valor')
+    condo = pc.struct_field(pc.extract_regex(values, CONDO_PATTERN), 'valor')
+    return _to_number(pc.if_else(excluded, condo, value), pa.float64())
+
+
+def normalize_location(values):
+    """
+    Versão vetorizada de parse_location.
+
+    Args:
+        - values (pa.Array): Textos raspados
+    """
+    values = pc.utf8_trim_whitespace(pc.list_element(pc.split_pattern(values, ","), 0))
+    return _blank_to_null(values)
+
+
+def normalize_table(table: pa.Table):
+    """
+    Normaliza uma tabela com as colunas das spiders (texto ou já tipadas)
+    para o SCHEMA do warehouse. Colunas ausentes viram nulas; colunas
+    '<campo>_max' já presentes são mantidas.
+
+    Args:
+        - table (pa.Table): Tabela com os campos raspados
+    """
+    def column(name):
+        if name in table.column_names:
+            return table[name].combine_chunks()
+        return pa.nulls(len(table), pa.string())
+
+    columns = {
+        'tipo': pc.cast(column('tipo'), pa.string()),
+        'localizacao': normalize_location(pc.cast(column('localizacao'), pa.string())),
+    }
+    for field in RANGE_FIELDS:
+        low, high = normalize_range(column(field))
+        if f"{field}_max" in table.column_names:
+            high = pc.coalesce(pc.cast(column(f"{field}_max"), pa.int32()), low)
+        columns[field] = low
+        columns[f"{field}_max"] = high
+    for field in CURRENCY_FIELDS:
+        columns[field] = normalize_currency(column(field))
+    columns['duplicata_de'] = pc.cast(column('duplicata_de'), pa.string())
+    return pa.Table.from_pydict(columns, schema=SCHEMA)
+
+
+def _sql_text(name):
+    return f"CAST({name} AS VARCHAR)"
+
+
+def _sql_number(expr, sql_type):
+    return f"TRY_CAST(NULLIF(REPLACE(REPLACE({expr}, '.', ''), ',', '.'), '') AS {sql_type})"
+
+
+def normalize_sql():
+    """
+    Expressões SQL (DuckDB) que normalizam as colunas brutas para o SCHEMA,
+    na ordem das colunas, prontas para um SELECT. A relação lida precisa ter
+    todas as colunas do SCHEMA (as ausentes no arquivo podem vir nulas).
+    """
+    pattern = RANGE_PATTERN.replace("'", "''")
+    currency = CURRENCY_PATTERN.replace("'", "''")
+    condo = CONDO_PATTERN.replace("'", "''")
+    expressions = [
+        "CAST(tipo AS VARCHAR) AS tipo",
+        f"NULLIF(TRIM(SPLIT_PART({_sql_text('localizacao')}, ',', 1)), '') AS localizacao",
+    ]
+    for field in RANGE_FIELDS:
+        low = _sql_number(f"REGEXP_EXTRACT({_sql_text(field)}, '{pattern}', 1)", "INTEGER")
+        high = _sql_number(f"REGEXP_EXTRACT({_sql_text(field)}, '{pattern}', 2)", "INTEGER")
+        expressions.append(f"{low} AS {field}")
+        expressions.append(f"COALESCE(TRY_CAST({field}_max AS INTEGER), {high}, {low}) AS {field}_max")
+    for field in CURRENCY_FIELDS:
+        value = _sql_number(f"REGEXP_EXTRACT({_sql_text(field)}, '{currency}', 1)", "DOUBLE")
+        condo_value = _sql_number(f"REGEXP_EXTRACT({_sql_text(field)}, '{condo}', 1)", "DOUBLE")
+        expressions.append(
+            f"CASE WHEN CONTAINS(UPPER({_sql_text(field)}), '{EXCLUDED_CURRENCY}') "
+            f"THEN {condo_value} ELSE {value} END AS {field}"
+        )
+    expressions.append("CAST(duplicata_de AS VARCHAR) AS duplicata_de")
+    return expressions
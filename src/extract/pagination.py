@@ -0,0 +1,142 @@
+import math
+import re
+
+import scrapy
+from itemadapter import ItemAdapter
+
+TOTAL_PATTERN = re.compile(r"(\d{1,3}(?:\.\d{3})+|\d+)\s+im[óo]ve(?:l|is)", re.IGNORECASE)
+
+
+def parse_total(texts: list):
+    """
+    Extrai o total de resultados de textos como '1.234 Imóveis à venda'.
+
+    Args:
+        - texts (list): Textos do cabeçalho da listagem
+    """
+    match = TOTAL_PATTERN.search(" ".join(texts))
+    return int(match.group(1).replace(".", "")) if match else None
+
+
+class PageFanOut:
+    """
+    Paginação em paralelo para portais com URLs '?pagina=N' determinísticas.
+
+    A primeira página de cada 'tipo' informa o total de resultados, do qual
+    sai a última página. As demais são agendadas em uma janela deslizante do
+    tamanho da concorrência do domínio: cada página concluída libera a
+    próxima. O tipo para de ser paginado quando uma página volta vazia ou
+    repete o conteúdo de outra já vista. Uma página cujo parse falha também
+    libera a vaga (parse), para que a janela não encolha até o fim da
+    raspagem.
+
+    Args:
+        - max_pages (int): Limite de páginas por tipo
+        - total_selector (str): Seletor CSS dos textos com o total de resultados
+    """
+
+    def __init__(self, max_pages: int, total_selector: str):
+        self.max_pages = max_pages
+        self.total_selector = total_selector
+        self.state = {}
+
+    def parse(self, spider, response, extract):
+        """
+        Extrai os itens da página com 'extract' e segue a paginação. Se a
+        extração falhar, a vaga da página é liberada e a próxima é agendada
+        antes de o erro seguir para o Scrapy.
+
+        Args:
+            - spider (scrapy.Spider): Spider dona da paginação
+            - response (scrapy.http.Response): Página baixada
+            - extract (callable): Função response -> lista de itens
+        """
+        try:
+            items = extract(response)
+        except Exception:
+            yield from self._release(spider, response)
+            raise
+        yield from self.follow(spider, response, items)
+
+    def follow(self, spider, response, items: list):
+        """
+        Emite os itens da página, se ela não repetir outra já vista, e as
+        requisições das próximas páginas do tipo da resposta.
+
+        Args:
+            - spider (scrapy.Spider): Spider dona da paginação
+            - response (scrapy.http.Response): Página recém processada
+            - items (list): Itens extraídos da página
+        """
+        tipo = response.meta['tipo']
+        page = response.meta['page']
+
+        if page == 1:
+            total = parse_total(response.css(self.total_selector).getall())
+            last_page = self.max_pages
+            if total and items:
+                last_page = min(self.max_pages, math.ceil(total / len(items)))
+            self.state[tipo] = {
+                'base_url': response.url.split('?')[0],
+                'last_page': last_page,
+                'next_page': 2,
+                'in_flight': 0,
+                'seen': set(),
+                'stopped': False,
+            }
+
+        state = self.state.get(tipo)
+        if state is None:
+            yield from items
+            return
+        if page > 1:
+            state['in_flight'] -= 1
+
+        signature = hash(tuple(tuple(ItemAdapter(item).values()) for item in items))
+        if not items or signature in state['seen']:
+            if not state['stopped']:
+                spider.logger.info(f"Paginação de '{tipo}' encerrada na página {page} (vazia ou repetida).")
+            state['stopped'] = True
+            return
+        state['seen'].add(signature)
+
+        yield from items
+        yield from self._schedule(spider, response, tipo, state)
+
+    def failed(self, spider, failure):
+        """
+        Libera a vaga de uma página que falhou e agenda a próxima.
+        """
+        yield from self._release(spider, failure.request)
+
+    def _release(self, spider, source):
+        state = self.state.get(source.meta['tipo'])
+        if state is None or source.meta['page'] == 1:
+            return
+        state['in_flight'] -= 1
+        yield from self._schedule(spider, source, source.meta['tipo'], state)
+
+    def _schedule(self, spider, source, tipo, state):
+        if state['stopped']:
+            return
+        window = self._window(spider, source)
+        while state['in_flight'] < window and state['next_page'] <= state['last_page']:
+            page = state['next_page']
+            state['next_page'] += 1
+            state['in_flight'] += 1
+            yield scrapy.Request(
+                url=f"{state['base_url']}?pagina={page}",
+                callback=spider.parse,
+                errback=spider.parse_error,
+                meta={'tipo': tipo, 'page': page}
+            )
+
+    def _window(self, spider, source):
+        crawler = getattr(spider, 'crawler', None)
+        if crawler is None:
+            return 1
+        engine = crawler.engine
+        slot = engine.downloader.slots.get(source.meta.get('download_slot')) if engine else None
+        if slot is not None:
+            return max(slot.concurrency, 1)
+        return max(crawler.settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN"), 1)
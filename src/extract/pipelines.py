@@ -0,0 +1,157 @@
+import logging
+import os
+import time
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from itemadapter import ItemAdapter
+from scrapy.exceptions import NotConfigured
+
+from extract.normalize import PARQUET_SUFFIX
+from extract.normalize import SCHEMA as ITEM_SCHEMA
+from extract.normalize import normalize_table
+
+logger = logging.getLogger(__name__)
+
+FIELDS = tuple(ITEM_SCHEMA.names)
+MESES = ('jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez')
+
+SCHEMA = ITEM_SCHEMA.append(pa.field('origem', pa.string())).append(pa.field('date_ref', pa.string()))
+SQL_TYPES = {pa.string(): "VARCHAR", pa.int32(): "INTEGER", pa.float64(): "DOUBLE"}
+
+
+def month_table(date_ref: str):
+    """
+    Retorna (schema, tabela) do mês no padrão da ingestão: '2025-06' -> ('imoveis_2025', 'jun').
+
+    Args:
+        - date_ref (str): Data de referência ('YYYY-MM')
+    """
+    ano, mes = date_ref.split("-")
+    return f"imoveis_{ano}", MESES[int(mes) - 1]
+
+
+class WarehousePipeline:
+    """
+    Grava os itens direto no warehouse, em lotes colunares de
+    WAREHOUSE_BATCH_SIZE itens, com as colunas 'origem' e 'date_ref'.
+    Cada lote passa pela normalização vetorizada (extract.normalize), de
+    modo que itens com textos brutos chegam tipados como os Imovel.
+
+    - WAREHOUSE_FORMAT='duckdb': acrescenta os lotes a uma tabela de carga
+      (imoveis_<ano>.<mês>_carga_<spider>) e, ao fim da raspagem, troca a
+      fatia da origem na tabela do mês (imoveis_<ano>.<mês>) em uma única
+      transação. Uma raspagem bloqueada ou interrompida não apaga o mês.
+    - WAREHOUSE_FORMAT='parquet': escreve um arquivo zstd por spider em
+      WAREHOUSE_PARQUET_DIR/date_ref=<YYYY-MM>/origem=<origem>/<spider>.itens.parquet,
+      com um row group por lote, publicado ao fim da raspagem (uma raspagem
+      sem itens mantém o arquivo anterior). O nome não
+      coincide com o dos Parquets da ingestão em lote, que os mantém.
+    """
+
+    def __init__(self, settings):
+        self.format = settings.get("WAREHOUSE_FORMAT")
+        self.db_path = settings.get("WAREHOUSE_PATH")
+        self.parquet_dir = settings.get("WAREHOUSE_PARQUET_DIR")
+        self.batch_size = settings.getint("WAREHOUSE_BATCH_SIZE")
+        self.date_ref = settings.get("DATE_REF") or time.strftime("%Y-%m")
+        self.schema_name, self.table_name = month_table(self.date_ref)
+        self.staging = None
+        self.columns = {field: [] for field in FIELDS}
+        self.rows = 0
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("WAREHOUSE_ENABLED"):
+            raise NotConfigured
+        return cls(crawler.settings)
+
+    def open_spider(self, spider):
+        self.origem = spider.origem
+        if self.format == "parquet":
+            folder = os.path.join(self.parquet_dir, f"date_ref={self.date_ref}", f"origem={self.origem}")
+            os.makedirs(folder, exist_ok=True)
+            self.parquet_path = os.path.join(folder, f"{spider.name}{PARQUET_SUFFIX}")
+            self.writer = pq.ParquetWriter(f"{self.parquet_path}.tmp", SCHEMA, compression="zstd")
+        else:
+            self.staging = f"{self.schema_name}.{self.table_name}_carga_{spider.name}"
+            with duckdb.connect(self.db_path) as conn:
+                columns = ", ".join(f"{field.name} {SQL_TYPES[field.type]}" for field in SCHEMA)
+                conn.execute(f"CREATE SCHEMA IF NOT EXISTS {self.schema_name}")
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {self.schema_name}.{self.table_name} ({columns})")
+                # A carga de uma raspagem anterior interrompida é descartada
+                conn.execute(f"CREATE OR REPLACE TABLE {self.staging} ({columns})")
+        logger.info(f"Gravando itens de '{self.origem}' ({self.date_ref}) em {self._target()}.")
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        for field, values in self.columns.items():
+            values.append(adapter.get(field))
+        if len(self.columns['tipo']) >= self.batch_size:
+            self._flush()
+        return item
+
+    def close_spider(self, spider):
+        self._flush()
+        if self.writer is not None:
+            self._publish()
+        else:
+            self._swap()
+        logger.info(f"{self.rows} linhas gravadas em {self._target()}.")
+
+    def _publish(self):
+        """
+        Publica o Parquet da raspagem no lugar do anterior. Sem nenhuma linha
+        raspada, o arquivo do mês fica como estava.
+        """
+        self.writer.close()
+        if not self.rows:
+            os.remove(f"{self.parquet_path}.tmp")
+            logger.warning(f"Nenhum item de '{self.origem}': {self.parquet_path} mantido sem alterações.")
+            return
+        os.replace(f"{self.parquet_path}.tmp", self.parquet_path)
+
+    def _swap(self):
+        """
+        Substitui a fatia da origem na tabela do mês pelas linhas da carga,
+        em uma transação. Sem nenhuma linha raspada, o mês fica como estava.
+        """
+        tabela = f"{self.schema_name}.{self.table_name}"
+        with duckdb.connect(self.db_path) as conn:
+            if not self.rows:
+                conn.execute(f"DROP TABLE IF EXISTS {self.staging}")
+                logger.warning(f"Nenhum item de '{self.origem}': {tabela} mantida sem alterações.")
+                return
+            try:
+                conn.execute("BEGIN TRANSACTION")
+                conn.execute(f"DELETE FROM {tabela} WHERE origem = ?", [self.origem])
+                conn.execute(f"INSERT INTO {tabela} BY NAME SELECT * FROM {self.staging}")
+                conn.execute(f"DROP TABLE {self.staging}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _flush(self):
+        size = len(self.columns['tipo'])
+        if not size:
+            return
+        batch = normalize_table(pa.Table.from_pydict(self.columns))
+        batch = batch.append_column('origem', pa.array([self.origem] * size, pa.string()))
+        batch = batch.append_column('date_ref', pa.array([self.date_ref] * size, pa.string()))
+        if self.writer is not None:
+            self.writer.write_table(batch)
+        else:
+            # Conexão aberta só durante o lote, para não prender o arquivo do banco
+            with duckdb.connect(self.db_path) as conn:
+                conn.register("lote", batch)
+                conn.execute(f"INSERT INTO {self.staging} BY NAME SELECT * FROM lote")
+        self.rows += size
+        self.columns = {field: [] for field in FIELDS}
+
+    def _target(self):
+        if self.writer is not None:
+            return self.parquet_path
+        return f"{self.db_path}:{self.schema_name}.{self.table_name}"
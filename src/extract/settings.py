@@ -12,7 +12,9 @@ BOT_NAME = "extract"
 SPIDER_MODULES = ["extract.spiders"]
 NEWSPIDER_MODULE = "extract.spiders"
 
-ADDONS = {}
+ADDONS = {
+    "extract.archive.ArchiveAddon": 100,
+}
 
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
@@ -46,15 +48,49 @@ COOKIES_ENABLED = False
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "extract.middlewares.ExtractSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    "extract.telemetry.CrawlTelemetry": 950,
+    "extract.incremental.IncrementalMiddleware": 543,
+}
+
+# Incremental crawl: skip listings already seen in earlier runs and stop
+# paginating a 'tipo' after INCREMENTAL_STOP_PAGES pages with nothing new.
+# Enable per run with: scrapy crawl zap -s INCREMENTAL_ENABLED=True
+INCREMENTAL_ENABLED = False
+INCREMENTAL_DIR = "../data/fingerprints"
+INCREMENTAL_STOP_PAGES = 2
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "extract.middlewares.ExtractDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    "extract.throttle.AdaptiveThrottle": 600,
+}
+
+# Adaptive per-domain throttle (see extract/throttle.py). DOWNLOAD_DELAY and
+# CONCURRENT_REQUESTS_PER_DOMAIN above are only the starting point for a
+# domain with no saved state; the values learned in each run are stored in
+# ADAPTIVE_THROTTLE_STATE and reused by the next one. Concurrency is only
+# raised once the delay reaches 0; with ADAPTIVE_THROTTLE_MIN_DELAY > 0 the
+# throttle drives the delay alone.
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE_MIN_DELAY = 0
+ADAPTIVE_THROTTLE_MAX_DELAY = 60
+ADAPTIVE_THROTTLE_MAX_CONCURRENCY = 8
+ADAPTIVE_THROTTLE_WINDOW = 10
+ADAPTIVE_THROTTLE_LATENCY_FACTOR = 3.0
+ADAPTIVE_THROTTLE_STATE = "../data/throttle_state.json"
+ADAPTIVE_THROTTLE_DEBUG = False
+
+# Per-spider crawl telemetry (see extract/telemetry.py). Registered as a
+# spider middleware close to the spider so it can time each parse call.
+# TELEMETRY_FORMAT is "jsonl" (appends crawl_metrics.jsonl) or "prometheus"
+# (<spider>.prom textfile); TELEMETRY_DB gets a row in ops.crawl_metrics.
+# Off by default so ad hoc crawls don't write into the warehouse.
+# Enable per run with: scrapy crawl zap -s TELEMETRY_ENABLED=True
+TELEMETRY_ENABLED = False
+TELEMETRY_DIR = "../data/telemetry"
+TELEMETRY_FORMAT = "jsonl"
+TELEMETRY_DB = "../data/database.duckdb"
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -64,9 +100,37 @@ COOKIES_ENABLED = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "extract.pipelines.ExtractPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "extract.dedup.DedupPipeline": 200,
+    "extract.pipelines.WarehousePipeline": 300,
+}
+
+# Crawl-time dedup (see extract/dedup.py): exact repeats are dropped with a
+# bloom filter; near-duplicates of listings other portals already scraped for
+# the same DATE_REF are dropped or linked (duplicata_de) via MinHash/LSH.
+# Off by default so ad hoc crawls don't write indexes into data/dedup.
+# Enable per run with: scrapy crawl zap -s DEDUP_ENABLED=True
+DEDUP_ENABLED = False
+DEDUP_MODE = "link"
+DEDUP_DIR = "../data/dedup"
+DEDUP_CAPACITY = 1_000_000
+DEDUP_ERROR_RATE = 0.001
+DEDUP_THRESHOLD = 0.7
+# Load the other portals' indexes at spider open. Spiders running at the
+# same time (src/load/pipeline.py) turn this off and link feeds afterwards.
+DEDUP_CROSS_PORTAL = True
+
+# Write items straight to the warehouse in columnar batches (see
+# extract/pipelines.py). WAREHOUSE_FORMAT is "duckdb" (month table
+# imoveis_<year>.<month>) or "parquet" (date_ref=/origem= folders of the
+# lake read by the dbt bronze layer).
+# DATE_REF ("YYYY-MM") defaults to the current month.
+WAREHOUSE_ENABLED = False
+WAREHOUSE_FORMAT = "duckdb"
+WAREHOUSE_PATH = "../data/database.duckdb"
+WAREHOUSE_PARQUET_DIR = "../data/lake/imoveis"
+WAREHOUSE_BATCH_SIZE = 1000
+DATE_REF = None
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -89,5 +153,12 @@ COOKIES_ENABLED = False
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
+# Monthly response archive (see extract/archive.py). ARCHIVE_MODE "record"
+# stores every response under ARCHIVE_DIR/ARCHIVE_MONTH; "replay" re-runs the
+# spiders against the archive with no network access.
+ARCHIVE_MODE = None
+ARCHIVE_MONTH = None
+ARCHIVE_DIR = "../data/archive"
+
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
@@ -1,8 +1,12 @@
 import scrapy
 
+from extract.cards import CardExtractor
+from extract.items import Imovel
+
 
 class ChavesSpider(scrapy.Spider):
     name = "chaves"
+    origem = "Chaves na Mão"
     allowed_domains = ["www.chavesnamao.com.br"]
 
     tipos = {
@@ -11,6 +15,16 @@ class ChavesSpider(scrapy.Spider):
         "Condomínio": "casas-em-condominio-a-venda"
     }
 
+    extractor = CardExtractor(
+        card='span.card-module__1awNxG__cardContent',
+        fields={
+            'localizacao': 'address.style-module__PkTDxW__address p::text',
+            'comodos': 'span.style-module__PkTDxW__list p::text',
+            'condo': 'p.column.style-module__PkTDxW__price small::text',
+            'preco': 'span.card-module__1awNxG__cardContent p b::text',
+        }
+    )
+
     def start_requests(self):
         for tipo_nome, tipo_url in self.tipos.items():
             url = f"https://www.chavesnamao.com.br/{tipo_url}/ce-fortaleza/"
@@ -20,47 +34,35 @@ class ChavesSpider(scrapy.Spider):
                 meta={'tipo': tipo_nome, 'page': 1}
             )
 
-    def clean_prices(self, price_str):
-        if not price_str:
-            return None
-        return price_str.replace("R$", "").replace(".", "").strip()
-
-    def clean_local(self, local_str):
-        if not local_str:
-            return None
-        return local_str.split(",")[0]
-
     def parse(self, response):
         tipo = response.meta['tipo']
         page = response.meta['page']
 
-        imoveis = response.css('span.card-module__1awNxG__cardContent')
-
-        for imovel in imoveis:
-            raw_loc = imovel.css('address.style-module__PkTDxW__address p::text').getall()
+        for imovel in self.extractor.extract(response):
+            raw_loc = imovel['localizacao']
             localizacao = raw_loc[1] if len(raw_loc) > 1 else None
 
-            comodos = imovel.css('span.style-module__PkTDxW__list p::text').getall()
+            comodos = imovel['comodos']
             area = comodos[1] if len(comodos) > 1 else None
             quartos = comodos[3] if len(comodos) > 3 else None
             vagas = comodos[5] if len(comodos) > 5 else None
             banheiros = comodos[7] if len(comodos) > 7 else None
 
-            raw_condo = imovel.css('p.column.style-module__PkTDxW__price small::text').getall()
+            raw_condo = imovel['condo']
             condo = raw_condo[1] if len(raw_condo) > 1 else None
 
-            preco = imovel.css('span.card-module__1awNxG__cardContent p b::text').get()
+            preco = imovel['preco'][0] if imovel['preco'] else None
 
-            yield {
-                'preco': self.clean_prices(preco),
-                'tipo': tipo,
-                'localizacao': self.clean_local(localizacao),
-                'area': area,
-                'quartos': quartos,
-                'banheiros': banheiros,
-                'vagas': vagas,
-                'condo': self.clean_prices(condo)
-            }
+            yield Imovel.from_texts(
+                tipo=tipo,
+                localizacao=localizacao,
+                area=area,
+                quartos=quartos,
+                banheiros=banheiros,
+                vagas=vagas,
+                preco=preco,
+                condo=condo
+            )
 
         if page < 99:
             next_page = response.css('a[rel="next"]::attr(href)').get()
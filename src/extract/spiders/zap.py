@@ -1,8 +1,13 @@
 import scrapy
 
+from extract.cards import CardExtractor
+from extract.items import Imovel
+from extract.pagination import PageFanOut
+
 
 class ZapSpider(scrapy.Spider):
     name = "zap"
+    origem = "ZAP Imóveis"
     allowed_domains = ["www.zapimoveis.com.br"]
 
     tipos = {
@@ -11,6 +16,19 @@ class ZapSpider(scrapy.Spider):
         "Condomínio": "casas-de-condominio"
     }
 
+    extractor = CardExtractor(
+        card='div.flex.flex-col.content-stretch',
+        fields={
+            'comodos': 'ul.flex.flex-row.text-1-75.text-neutral-110.text-nowrap.gap-3 li h3::text',
+            'precos': 'div.shrink.grow.text-nowrap.min-w-0 p::text',
+            'localizacao': 'h2[data-cy="rp-cardProperty-location-txt"]::text',
+        }
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pages = PageFanOut(max_pages=50, total_selector='h1 ::text')
+
     def start_requests(self):
         for tipo_nome, tipo_url in self.tipos.items():
             url = f"https://www.zapimoveis.com.br/venda/{tipo_url}/ce+fortaleza/"
@@ -20,49 +38,40 @@ class ZapSpider(scrapy.Spider):
                 meta={'tipo': tipo_nome, 'page': 1}
             )
 
-    def clean_prices(self, price_str):
-        if not price_str:
-            return None
-        return price_str.replace("R$", "").replace(".", "").strip()
-
     def parse(self, response):
-        tipo = response.meta['tipo']
-        page = response.meta['page']
+        yield from self.pages.parse(self, response, self.parse_cards)
 
-        imoveis = response.css('div.flex.flex-col.content-stretch')
+    def parse_cards(self, response):
+        tipo = response.meta['tipo']
 
-        for imovel in imoveis:
-            comodos = imovel.css(
-                'ul.flex.flex-row.text-1-75.text-neutral-110.text-nowrap.gap-3 li h3::text'
-            ).getall()
+        imoveis = []
+        for imovel in self.extractor.extract(response):
+            comodos = imovel['comodos']
 
-            area = comodos[0].split(" ")[0] if len(comodos) > 0 else None
+            area = comodos[0] if len(comodos) > 0 else None
             quartos = comodos[1] if len(comodos) > 1 else None
             banheiros = comodos[2] if len(comodos) > 2 else None
             vagas = comodos[3] if len(comodos) > 3 else None
 
-            precos = imovel.css('div.shrink.grow.text-nowrap.min-w-0 p::text').getall()
-            preco = self.clean_prices(precos[0]) if len(precos) > 0 else None
+            precos = imovel['precos']
+            preco = precos[0] if len(precos) > 0 else None
             condo = precos[1] if len(precos) > 1 else None
 
-            localizacao = imovel.css('h2[data-cy="rp-cardProperty-location-txt"]::text').getall()
-            bairro_cidade = localizacao[-1].strip().split(",")[0] if localizacao else None
-
-            yield {
-                'tipo': tipo,
-                'localizacao': bairro_cidade,
-                'area': area,
-                'quartos': quartos,
-                'banheiros': banheiros,
-                'vagas': vagas,
-                'preco': preco,
-                'condo': condo
-            }
-
-        if page < 50:
-            next_page = f"{response.url.split('?')[0]}?pagina={page + 1}"
-            yield scrapy.Request(
-                url=next_page,
-                callback=self.parse,
-                meta={'tipo': tipo, 'page': page + 1}
-            )
+            localizacao = imovel['localizacao']
+            bairro_cidade = localizacao[-1] if localizacao else None
+
+            imoveis.append(Imovel.from_texts(
+                tipo=tipo,
+                localizacao=bairro_cidade,
+                area=area,
+                quartos=quartos,
+                banheiros=banheiros,
+                vagas=vagas,
+                preco=preco,
+                condo=condo
+            ))
+
+        return imoveis
+
+    def parse_error(self, failure):
+        yield from self.pages.failed(self, failure)
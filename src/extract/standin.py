@@ -0,0 +1,150 @@
+"""
+Servidor local que imita portais com limites de taxa diferentes, para
+exercitar o throttle adaptativo sem acessar os sites reais.
+
+Cada domínio simulado é um IP de loopback próprio (127.0.0.x), que vira um
+slot separado no downloader do Scrapy. Acima da taxa configurada o servidor
+responde 429 com Retry-After; a latência cresce com as requisições em curso.
+
+Uso (a partir de src/):
+    python -m extract.standin --dominio 127.0.0.2=5 --dominio 127.0.0.3=40 --paginas 150
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scrapy
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+logger = logging.getLogger(__name__)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "zap.html")
+
+
+class RateLimitedServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP com balde de fichas: 'rate' requisições/s e rajada 'burst'.
+
+    Args:
+        - address (tuple): (IP, porta)
+        - rate (float): Requisições por segundo aceitas
+        - latency (float): Latência base de cada resposta, em segundos
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, rate: float, latency: float):
+        super().__init__(address, StandinHandler)
+        self.rate = rate
+        self.burst = max(rate, 1.0)
+        self.latency = latency
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.counts = {'ok': 0, 'throttled': 0}
+        with open(FIXTURE, "rb") as f:
+            self.body = f.read()
+
+    def admit(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens < 1:
+                self.counts['throttled'] += 1
+                return False
+            self.tokens -= 1
+            self.counts['ok'] += 1
+            self.in_flight += 1
+            return True
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if not server.admit():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+        try:
+            time.sleep(server.latency * (1 + 0.25 * server.in_flight))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(server.body)))
+            self.end_headers()
+            self.wfile.write(server.body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinSpider(scrapy.Spider):
+    name = "standin"
+
+    def __init__(self, host=None, paginas=100, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.paginas = int(paginas)
+
+    async def start(self):
+        for page in range(1, self.paginas + 1):
+            yield scrapy.Request(f"http://{self.host}/pagina/{page}", callback=self.parse)
+
+    def parse(self, response):
+        yield {'url': response.url}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula portais com limite de taxa por domínio.")
+    parser.add_argument("--dominio", action="append", required=True, metavar="IP=REQ_POR_S",
+                        help="IP de loopback e taxa aceita, ex: 127.0.0.2=5")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência base (s)")
+    parser.add_argument("--paginas", type=int, default=100, help="Páginas pedidas por domínio")
+    parser.add_argument("--estado", default=os.path.join(tempfile.gettempdir(), "standin_throttle.json"),
+                        help="Arquivo de estado do throttle adaptativo")
+    args = parser.parse_args()
+
+    servers = {}
+    for spec in args.dominio:
+        ip, rate = spec.split("=")
+        server = RateLimitedServer((ip, args.porta), float(rate), args.latencia)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[f"{ip}:{args.porta}"] = server
+
+    settings = get_project_settings()
+    settings.set("ADAPTIVE_THROTTLE_ENABLED", True, "cmdline")
+    settings.set("ADAPTIVE_THROTTLE_STATE", args.estado, "cmdline")
+    settings.set("ADAPTIVE_THROTTLE_MIN_DELAY", 0, "cmdline")
+    settings.set("LOG_LEVEL", "INFO", "cmdline")
+    settings.set("ADAPTIVE_THROTTLE_DEBUG", True, "cmdline")
+
+    # Um crawler por domínio, como nas raspagens reais (uma spider por portal)
+    process = CrawlerProcess(settings)
+    for host in servers:
+        process.crawl(StandinSpider, host=host, paginas=args.paginas)
+    inicio = time.perf_counter()
+    process.start()
+    duracao = time.perf_counter() - inicio
+
+    logger.info(f"Duração: {duracao:.1f}s")
+    for host, server in servers.items():
+        logger.info(f"{host} (limite {server.rate:g} req/s): {server.counts['ok']} respostas, "
+                    f"{server.counts['throttled']} x 429")
+    with open(args.estado, encoding="utf-8") as f:
+        logger.info(f"Estado do throttle adaptativo: {json.dumps(json.load(f), indent=2)}")
+
+
+if __name__ == "__main__":
+    main()
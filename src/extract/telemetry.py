@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import time
+
+import duckdb
+from itemadapter import ItemAdapter, is_item
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+# Campos sem os quais o anúncio é descartado na camada silver
+REQUIRED_FIELDS = ('localizacao', 'area', 'preco')
+
+COLUMNS = {
+    'date_ref': "VARCHAR",
+    'spider': "VARCHAR",
+    'inicio': "TIMESTAMP",
+    'fim': "TIMESTAMP",
+    'duracao_s': "DOUBLE",
+    'paginas': "INTEGER",
+    'itens': "INTEGER",
+    'paginas_por_s': "DOUBLE",
+    'itens_por_pagina': "DOUBLE",
+    'paginas_vazias': "INTEGER",
+    'itens_incompletos': "INTEGER",
+    'parse_ms_medio': "DOUBLE",
+    'parse_ms_p95': "DOUBLE",
+    'bytes_total': "BIGINT",
+    'bytes_por_pagina': "DOUBLE",
+    'latencia_ms_p50': "DOUBLE",
+    'latencia_ms_p90': "DOUBLE",
+    'latencia_ms_p99': "DOUBLE",
+    'retries': "INTEGER",
+    'finish_reason': "VARCHAR",
+}
+
+
+def percentile(values: list, q: float):
+    """
+    Percentil pelo método do posto mais próximo.
+
+    Args:
+        - values (list): Amostras
+        - q (float): Percentil desejado, entre 0 e 100
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class CrawlTelemetry:
+    """
+    Métricas de desempenho de cada raspagem.
+
+    Registrado como spider middleware (para medir o tempo gasto no parse de
+    cada resposta e contar os itens por página) e ligado aos sinais do
+    crawler (bytes e latência das respostas). Ao fim da raspagem grava um
+    registro em TELEMETRY_DIR (JSONL ou texto do Prometheus) e na tabela
+    ops.crawl_metrics de TELEMETRY_DB, identificado pelo mês (DATE_REF).
+
+    Itens incompletos são os que chegam sem algum de REQUIRED_FIELDS, sinal
+    de seletor vazio; páginas vazias são respostas sem nenhum item.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.stats = crawler.stats
+        self.output_dir = settings.get("TELEMETRY_DIR")
+        self.format = settings.get("TELEMETRY_FORMAT")
+        self.db_path = settings.get("TELEMETRY_DB")
+        self.date_ref = settings.get("DATE_REF") or time.strftime("%Y-%m")
+        self.parse_seconds = []
+        self.latencies = []
+        self.bytes = 0
+        self.items = 0
+        self.empty_pages = 0
+        self.incomplete = 0
+        self.started = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("TELEMETRY_ENABLED"):
+            raise NotConfigured
+        o = cls(crawler)
+        crawler.signals.connect(o.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(o.response_received, signal=signals.response_received)
+        crawler.signals.connect(o.spider_closed, signal=signals.spider_closed)
+        return o
+
+    def spider_opened(self, spider):
+        self.started = time.time()
+
+    def response_received(self, response, request, spider):
+        self.bytes += len(response.body)
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def process_spider_output(self, response, result, spider):
+        page = {'items': 0, 'seconds': 0.0}
+        iterator = iter(result)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                o = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                page['seconds'] += time.perf_counter() - inicio
+            self._count(o, page)
+            yield o
+        self._record_page(page)
+
+    async def process_spider_output_async(self, response, result, spider):
+        page = {'items': 0, 'seconds': 0.0}
+        iterator = result.__aiter__()
+        while True:
+            inicio = time.perf_counter()
+            try:
+                o = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                page['seconds'] += time.perf_counter() - inicio
+            self._count(o, page)
+            yield o
+        self._record_page(page)
+
+    def _count(self, o, page):
+        if not is_item(o):
+            return
+        page['items'] += 1
+        adapter = ItemAdapter(o)
+        if any(adapter.get(field) is None for field in REQUIRED_FIELDS):
+            self.incomplete += 1
+
+    def _record_page(self, page):
+        self.parse_seconds.append(page['seconds'])
+        self.items += page['items']
+        if not page['items']:
+            self.empty_pages += 1
+
+    def spider_closed(self, spider, reason):
+        record = self.summary(spider.name, reason)
+        logger.info(
+            f"Telemetria '{spider.name}': {record['paginas']} páginas ({record['paginas_por_s']:.2f}/s), "
+            f"{record['itens_por_pagina']:.1f} itens/página, {record['paginas_vazias']} páginas vazias, "
+            f"{record['itens_incompletos']} itens incompletos, parse {record['parse_ms_medio']:.1f} ms/página."
+        )
+        if self.output_dir:
+            self._write_file(record)
+        if self.db_path:
+            self._write_db(record)
+
+    def summary(self, spider_name: str, reason: str):
+        """
+        Consolida as métricas da raspagem em um registro (colunas de COLUMNS).
+
+        Args:
+            - spider_name (str): Nome da spider
+            - reason (str): Motivo do encerramento informado pelo Scrapy
+        """
+        fim = time.time()
+        inicio = self.started or fim
+        duracao = fim - inicio
+        paginas = len(self.parse_seconds)
+
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            'date_ref': self.date_ref,
+            'spider': spider_name,
+            'inicio': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(inicio)),
+            'fim': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(fim)),
+            'duracao_s': round(duracao, 3),
+            'paginas': paginas,
+            'itens': self.items,
+            'paginas_por_s': round(paginas / duracao, 3) if duracao else 0.0,
+            'itens_por_pagina': round(self.items / paginas, 2) if paginas else 0.0,
+            'paginas_vazias': self.empty_pages,
+            'itens_incompletos': self.incomplete,
+            'parse_ms_medio': ms(sum(self.parse_seconds) / paginas) if paginas else 0.0,
+            'parse_ms_p95': ms(percentile(self.parse_seconds, 95)),
+            'bytes_total': self.bytes,
+            'bytes_por_pagina': round(self.bytes / paginas, 1) if paginas else 0.0,
+            'latencia_ms_p50': ms(percentile(self.latencies, 50)),
+            'latencia_ms_p90': ms(percentile(self.latencies, 90)),
+            'latencia_ms_p99': ms(percentile(self.latencies, 99)),
+            'retries': self.stats.get_value("retry/count", 0),
+            'finish_reason': reason,
+        }
+
+    def _write_file(self, record):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.format == "prometheus":
+            path = os.path.join(self.output_dir, f"{record['spider']}.prom")
+            labels = f'spider="{record["spider"]}",date_ref="{record["date_ref"]}"'
+            with open(path, "w", encoding="utf-8") as f:
+                for name, value in record.items():
+                    if isinstance(value, (int, float)):
+                        f.write(f"crawl_{name}{{{labels}}} {value}\n")
+        else:
+            path = os.path.join(self.output_dir, "crawl_metrics.jsonl")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        logger.info(f"Telemetria gravada em '{path}'.")
+
+    def _write_db(self, record):
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in COLUMNS.items())
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        try:
+            with duckdb.connect(self.db_path) as conn:
+                conn.execute("CREATE SCHEMA IF NOT EXISTS ops")
+                conn.execute(f"CREATE TABLE IF NOT EXISTS ops.crawl_metrics ({columns})")
+                conn.execute(
+                    f"INSERT INTO ops.crawl_metrics ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                    [record[name] for name in COLUMNS],
+                )
+        except duckdb.Error as e:
+            # O banco pode estar aberto por outro processo; o arquivo já guarda o registro
+            logger.warning(f"Não foi possível gravar a telemetria em '{self.db_path}': {e}")
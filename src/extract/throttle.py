@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+# Delay abaixo do qual o controle passa direto ao piso (0 libera a concorrência)
+MIN_STEP = 0.05
+
+
+class DomainState:
+    """
+    Estado do controle adaptativo de um domínio (slot do downloader).
+
+    Args:
+        - concurrency (int): Requisições simultâneas permitidas
+        - delay (float): Intervalo entre requisições, em segundos
+        - ceiling (int): Concorrência máxima nesta raspagem
+    """
+
+    def __init__(self, concurrency: int, delay: float, ceiling: int):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.ceiling = ceiling
+        self.slot = None
+        self.latency = None
+        self.min_latency = None
+        self.responses = 0
+        self.errors = 0
+        self.throttled = 0
+        self.window = 0
+        self.cooldown_until = 0.0
+        self.floor_delay = 0.0
+
+    def to_dict(self):
+        return {
+            'concurrency': self.concurrency,
+            'delay': round(self.delay, 4),
+            'latency': round(self.latency, 4) if self.latency is not None else None,
+            'responses': self.responses,
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'updated': time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+class AdaptiveThrottle:
+    """
+    Downloader middleware que ajusta concorrência e delay por domínio.
+
+    Com delay > 0 o slot do Scrapy envia uma requisição por vez, a cada
+    'delay', e a concorrência não tem efeito; por isso o controle tem duas
+    fases: primeiro reduz o delay e, só com delay 0, aumenta a concorrência.
+
+    - A cada ADAPTIVE_THROTTLE_WINDOW respostas sem erro, se a latência média
+      estiver abaixo de ADAPTIVE_THROTTLE_LATENCY_FACTOR vezes a menor latência
+      observada a janela cresce: o delay cai 25% até o piso (abaixo de
+      MIN_STEP vai direto a ele) e, com delay 0, a concorrência sobe uma
+      unidade. Senão recua: com delay 0 a concorrência cai uma unidade, com
+      delay > 0 (ou concorrência 1) o delay cresce 25%.
+    - 429/503 ou erro de download: concorrência cai pela metade e o delay
+      dobra, com um período sem crescimento (ao menos o Retry-After). O delay
+      que provocou o bloqueio, +25%, vira o piso do domínio nesta raspagem;
+      se ele era 0, a concorrência que o provocou, -1, vira o teto.
+
+    Com ADAPTIVE_THROTTLE_MIN_DELAY > 0 o delay nunca chega a 0 e só ele é
+    ajustado. O slot recriado pelo downloader (descartado após ficar ocioso)
+    recebe de novo os valores do domínio. Os valores escolhidos por domínio
+    são gravados em ADAPTIVE_THROTTLE_STATE ao fim da raspagem e usados como
+    ponto de partida na próxima.
+    """
+
+    THROTTLE_CODES = (429, 503)
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.start_delay = settings.getfloat("DOWNLOAD_DELAY")
+        self.start_concurrency = settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN")
+        self.min_delay = settings.getfloat("ADAPTIVE_THROTTLE_MIN_DELAY")
+        self.max_delay = settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY")
+        self.max_concurrency = settings.getint("ADAPTIVE_THROTTLE_MAX_CONCURRENCY")
+        self.window = settings.getint("ADAPTIVE_THROTTLE_WINDOW")
+        self.latency_factor = settings.getfloat("ADAPTIVE_THROTTLE_LATENCY_FACTOR")
+        self.state_path = settings.get("ADAPTIVE_THROTTLE_STATE")
+        self.debug = settings.getbool("ADAPTIVE_THROTTLE_DEBUG")
+        self.saved = self._load_state()
+        self.domains = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_THROTTLE_ENABLED"):
+            raise NotConfigured
+        o = cls(crawler)
+        crawler.signals.connect(o.request_reached_downloader, signal=signals.request_reached_downloader)
+        crawler.signals.connect(o.spider_closed, signal=signals.spider_closed)
+        return o
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def spider_closed(self, spider):
+        if not self.state_path or not self.domains:
+            return
+        state = self._load_state()
+        state.update({key: domain.to_dict() for key, domain in self.domains.items()})
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        for key, domain in self.domains.items():
+            logger.info(
+                f"Throttle adaptativo '{key}': concorrência {domain.concurrency}, "
+                f"delay {domain.delay:.2f}s, {domain.throttled} bloqueios, {domain.errors} erros."
+            )
+
+    def request_reached_downloader(self, request, spider):
+        key = request.meta.get("download_slot")
+        domain = self.domains.get(key)
+        if domain is None:
+            saved = self.saved.get(key, {})
+            domain = DomainState(
+                concurrency=min(saved.get('concurrency', self.start_concurrency), self.max_concurrency),
+                delay=max(saved.get('delay', self.start_delay), self.min_delay),
+                ceiling=self.max_concurrency,
+            )
+            self.domains[key] = domain
+        if self.crawler.engine.downloader.slots.get(key) is not domain.slot:
+            # Slot novo ou recriado depois do GC do downloader
+            self._apply(key, domain)
+
+    def process_response(self, request, response, spider):
+        latency = request.meta.get("download_latency")
+        key = request.meta.get("download_slot")
+        domain = self.domains.get(key)
+        if latency is None or domain is None:
+            return response
+
+        domain.responses += 1
+        if response.status in self.THROTTLE_CODES:
+            domain.throttled += 1
+            self.stats.inc_value(f"adaptive_throttle/{key}/throttled")
+            self._back_off(key, domain, self._retry_after(response))
+        else:
+            self._observe(key, domain, latency)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        key = request.meta.get("download_slot")
+        domain = self.domains.get(key)
+        if domain is not None:
+            domain.errors += 1
+            self.stats.inc_value(f"adaptive_throttle/{key}/errors")
+            self._back_off(key, domain)
+
+    def _observe(self, key, domain, latency):
+        domain.latency = latency if domain.latency is None else 0.8 * domain.latency + 0.2 * latency
+        domain.min_latency = latency if domain.min_latency is None else min(domain.min_latency, latency)
+        if time.monotonic() < domain.cooldown_until:
+            return
+
+        domain.window += 1
+        if domain.window < self.window:
+            return
+        domain.window = 0
+        if domain.latency > self.latency_factor * domain.min_latency:
+            if domain.delay == 0 and domain.concurrency > 1:
+                domain.concurrency -= 1
+            else:
+                domain.delay = min(max(domain.delay * 1.25, MIN_STEP), self.max_delay)
+        else:
+            floor = max(domain.floor_delay, self.min_delay)
+            if domain.delay > floor:
+                delay = domain.delay * 0.75
+                domain.delay = floor if delay < MIN_STEP else max(delay, floor)
+            elif domain.delay == 0:
+                domain.concurrency = min(domain.concurrency + 1, domain.ceiling)
+        self._apply(key, domain)
+
+    def _back_off(self, key, domain, retry_after=None):
+        # O delay que provocou o bloqueio passa a ser o piso desta raspagem;
+        # sem delay, a concorrência que o provocou limita as próximas
+        if domain.delay == 0:
+            domain.ceiling = max(domain.concurrency - 1, 1)
+        domain.floor_delay = min(max(domain.delay * 1.25, domain.floor_delay), self.max_delay)
+        domain.concurrency = max(domain.concurrency // 2, 1)
+        domain.delay = min(max(domain.delay * 2, self.min_delay, 0.1), self.max_delay)
+        domain.window = 0
+        domain.cooldown_until = time.monotonic() + max(domain.delay * self.window, retry_after or 0)
+        self._apply(key, domain)
+
+    def _retry_after(self, response):
+        value = response.headers.get(b"Retry-After")
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    def _apply(self, key, domain):
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return
+        slot.concurrency = domain.concurrency
+        slot.delay = domain.delay
+        domain.slot = slot
+        self.stats.set_value(f"adaptive_throttle/{key}/concurrency", domain.concurrency)
+        self.stats.set_value(f"adaptive_throttle/{key}/delay", round(domain.delay, 4))
+        if self.debug:
+            latency = domain.latency or 0.0
+            logger.info(
+                f"slot: {key} | conc: {domain.concurrency:2d} | delay: {domain.delay * 1000:5.0f} ms | "
+                f"latency: {latency * 1000:5.0f} ms | 429: {domain.throttled}"
+            )
@@ -0,0 +1,260 @@
+"""
+Ingestão em lote de todos os meses raspados, sem perguntas interativas.
+
+Descobre as pastas data/raw/<mes>-<ano> (ex: 'jun-2025' -> date_ref
+'2025-06'). A leitura e a normalização de cada arquivo rodam em um pool de
+processos, com dois destinos:
+
+- lake (padrão): cada processo grava o seu arquivo em Parquet zstd no lake
+  particionado data/lake/imoveis/date_ref=<YYYY-MM>/origem=<origem>/, lido
+  pela camada bronze do dbt;
+- duckdb: só o processo principal escreve no data/database.duckdb (o
+  DuckDB aceita um único escritor), uma transação por mês na tabela
+  imoveis_<ano>.<mes>.
+
+O manifesto da ingestão (ops.ingestion_manifest) fica no banco nos dois casos.
+
+Uso (a partir da raiz do projeto):
+    python src/load/batch_ingestion.py
+    python src/load/batch_ingestion.py --meses mai-2025 jun-2025 --workers 4
+    python src/load/batch_ingestion.py --incremental --destino duckdb
+"""
+import argparse
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+import pyarrow.parquet as pq
+
+from data_ingestion import (MANIFEST_TABLE, create_manifest, file_hash, get_origin,
+                            list_files, raw_select, record_file)
+from extract.normalize import PARQUET_SUFFIX
+
+ORIGENS = {
+    "chaves": "Chaves na Mão",
+    "vivareal": "Viva Real",
+    "zap": "ZAP Imóveis"
+}
+
+MESES = ('jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez')
+FOLDER_PATTERN = re.compile(r"^(?P<mes>[a-zç]+)-(?P<ano>\d{4})$")
+
+
+def month_folders(raw_dir: str):
+    """
+    Lista as pastas de meses raspados com (pasta, date_ref, schema, tabela).
+
+    Args:
+        - raw_dir (str): Pasta com as raspagens ('data/raw')
+    """
+    folders = []
+    for name in sorted(os.listdir(raw_dir)):
+        match = FOLDER_PATTERN.match(name.lower())
+        path = os.path.join(raw_dir, name)
+        if not match or not os.path.isdir(path) or match.group('mes')[:3] not in MESES:
+            continue
+        mes = MESES.index(match.group('mes')[:3]) + 1
+        ano = match.group('ano')
+        folders.append((path, f"{ano}-{mes:02d}", f"imoveis_{ano}", name.split("-")[0]))
+    return sorted(folders, key=lambda folder: folder[1])
+
+
+def lake_file(lake_dir: str, date_ref: str, file_path: str):
+    """
+    Caminho do Parquet de um arquivo .JSON no lake particionado.
+
+    Args:
+        - lake_dir (str): Pasta da tabela no lake ('data/lake/imoveis')
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - file_path (str): Caminho do arquivo .JSON
+    """
+    name = os.path.basename(file_path)
+    origem = get_origin(name, ORIGENS)
+    return os.path.join(lake_dir, f"date_ref={date_ref}", f"origem={origem}", f"{os.path.splitext(name)[0]}.parquet")
+
+
+def parse_file(file_path: str, date_ref: str, lake_dir: str = None):
+    """
+    Lê e normaliza um arquivo .JSON em um processo do pool. Com 'lake_dir'
+    o próprio processo grava o Parquet da partição e não devolve a tabela.
+
+    Retorna (arquivo, tabela arrow ou None, linhas, bytes, segundos).
+
+    Args:
+        - file_path (str): Caminho do arquivo .JSON
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - lake_dir (str): Pasta da tabela no lake, se o destino for o lake
+    """
+    inicio = time.perf_counter()
+    with duckdb.connect() as conn:
+        table = conn.execute(raw_select(file_path, date_ref, ORIGENS)).fetch_arrow_table()
+    linhas = table.num_rows
+    if lake_dir:
+        path = lake_file(lake_dir, date_ref, file_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, f"{path}.tmp", compression="zstd")
+        os.replace(f"{path}.tmp", path)
+        table = None
+    return file_path, table, linhas, os.path.getsize(file_path), time.perf_counter() - inicio
+
+
+def unchanged(conn: duckdb.DuckDBPyConnection, files: list, tabela: str):
+    """
+    Indica se todos os arquivos do mês já estão no manifesto com o mesmo
+    tamanho e hash (e nenhum outro arquivo foi registrado para a tabela).
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - files (list): Arquivos .JSON da pasta do mês
+        - tabela (str): Tabela do mês ('schema.tabela')
+    """
+    manifest = {
+        arquivo: (tamanho, digest)
+        for arquivo, tamanho, digest in conn.execute(
+            f"SELECT arquivo, tamanho, hash FROM {MANIFEST_TABLE} WHERE tabela = ?", [tabela]
+        ).fetchall()
+    }
+    if set(manifest) != set(files):
+        return False
+    return all(manifest[file] == (os.path.getsize(file), file_hash(file)) for file in files)
+
+
+def write_month(conn: duckdb.DuckDBPyConnection, date_ref: str, schema_name: str,
+                table_name: str, results: list):
+    """
+    Grava um mês inteiro em uma transação: substitui a tabela e o manifesto.
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - schema_name (str): Schema da tabela
+        - table_name (str): Nome da tabela do mês
+        - results (list): Resultados de parse_file dos arquivos do mês
+    """
+    tabela = f"{schema_name}.{table_name}"
+    inicio = time.perf_counter()
+    try:
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
+        for index, (file_path, table, linhas, _, _) in enumerate(results):
+            conn.register("lote", table)
+            if index == 0:
+                conn.execute(f"CREATE OR REPLACE TABLE {tabela} AS SELECT * FROM lote")
+            else:
+                conn.execute(f"INSERT INTO {tabela} BY NAME SELECT * FROM lote")
+            conn.unregister("lote")
+        conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE tabela = ?", [tabela])
+        for file_path, _, linhas, _, _ in results:
+            origem = get_origin(os.path.basename(file_path), ORIGENS)
+            record_file(conn, file_path, tabela, origem, date_ref, file_hash(file_path), linhas)
+        conn.execute("COMMIT")
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        logging.error(f"Erro ao gravar {tabela}: {e}", exc_info=True)
+        raise
+    linhas = sum(result[2] for result in results)
+    logging.info(f"Tabela {tabela} salva: {linhas} linhas em {time.perf_counter() - inicio:.2f}s.")
+
+
+def publish_month(conn: duckdb.DuckDBPyConnection, lake_dir: str, date_ref: str, results: list):
+    """
+    Conclui um mês gravado no lake: apaga Parquets de arquivos que não
+    existem mais na pasta e atualiza o manifesto. Os Parquets gravados
+    direto pela raspagem (WarehousePipeline, '<spider>.itens.parquet') não
+    vêm de um arquivo .JSON e são mantidos.
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - lake_dir (str): Pasta da tabela no lake ('data/lake/imoveis')
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - results (list): Resultados de parse_file dos arquivos do mês
+    """
+    partition = os.path.join(lake_dir, f"date_ref={date_ref}")
+    written = {lake_file(lake_dir, date_ref, result[0]) for result in results}
+    for root, _, files in os.walk(partition):
+        for file in files:
+            path = os.path.join(root, file)
+            if file.endswith((PARQUET_SUFFIX, f"{PARQUET_SUFFIX}.tmp")):
+                continue
+            if path not in written:
+                os.remove(path)
+                logging.info(f"Parquet '{path}' sem arquivo de origem, removido.")
+
+    conn.execute("BEGIN TRANSACTION")
+    conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE tabela = ?", [partition])
+    for file_path, _, linhas, _, _ in results:
+        origem = get_origin(os.path.basename(file_path), ORIGENS)
+        record_file(conn, file_path, partition, origem, date_ref, file_hash(file_path), linhas)
+    conn.execute("COMMIT")
+    logging.info(f"Partição '{partition}' publicada: {sum(result[2] for result in results)} linhas.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestão em lote de todos os meses em data/raw.")
+    parser.add_argument("--raw-dir", default="data/raw", help="Pasta com as pastas <mes>-<ano>")
+    parser.add_argument("--db", default="data/database.duckdb", help="Banco de dados DuckDB")
+    parser.add_argument("--destino", choices=["lake", "duckdb"], default="lake",
+                        help="lake: Parquet particionado (padrão); duckdb: tabelas imoveis_<ano>.<mes>")
+    parser.add_argument("--lake-dir", default="data/lake/imoveis", help="Pasta da tabela no lake")
+    parser.add_argument("--meses", nargs="*", help="Pastas a ingerir (padrão: todas)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processos de leitura")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Ignora meses cujos arquivos não mudaram desde a última ingestão")
+    args = parser.parse_args()
+
+    folders = [
+        folder for folder in month_folders(args.raw_dir)
+        if not args.meses or os.path.basename(folder[0]) in args.meses
+    ]
+    conn = duckdb.connect(args.db)
+    logging.info("Conexão com banco de dados iniciada.")
+    create_manifest(conn)
+
+    months = []
+    for path, date_ref, schema_name, table_name in folders:
+        files = list_files(path)
+        if not files:
+            continue
+        tabela = f"{schema_name}.{table_name}"
+        if args.destino == "lake":
+            tabela = os.path.join(args.lake_dir, f"date_ref={date_ref}")
+        if args.incremental and unchanged(conn, files, tabela):
+            logging.info(f"Pasta '{path}' sem alterações, ignorada.")
+            continue
+        months.append((date_ref, schema_name, table_name, files))
+
+    lake_dir = args.lake_dir if args.destino == "lake" else None
+    inicio = time.perf_counter()
+    total = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            (month, [pool.submit(parse_file, file, month[0], lake_dir) for file in month[3]])
+            for month in months
+        ]
+        for (date_ref, schema_name, table_name, _), month_futures in futures:
+            results = []
+            for future in month_futures:
+                result = future.result()
+                file_path, _, linhas, tamanho, segundos = result
+                logging.info(
+                    f"'{file_path}': {linhas} linhas em {segundos:.2f}s | "
+                    f"{linhas / segundos:,.0f} linhas/s | {tamanho / segundos / 1e6:.1f} MB/s"
+                )
+                results.append(result)
+            if lake_dir:
+                publish_month(conn, lake_dir, date_ref, results)
+            else:
+                write_month(conn, date_ref, schema_name, table_name, results)
+            total += sum(result[2] for result in results)
+
+    duracao = time.perf_counter() - inicio
+    logging.info(f"Ingestão concluída: {len(months)} meses, {total} linhas em {duracao:.2f}s.")
+    conn.close()
+    logging.info("Conexão com o banco de dados encerrada.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark de escala da ingestão e dos modelos do dbt sobre dados sintéticos.
+
+Para cada tamanho, gera os arquivos brutos com synthetic.py e mede, em um
+subprocesso por etapa:
+
+- lake / duckdb: src/load/batch_ingestion.py com cada destino (linhas/s e
+  pico de memória do maior processo: o principal ou um dos processos do
+  pool, não a soma deles);
+- dbt: 'dbt run' sobre o lake gerado, em um banco próprio do benchmark
+  (tempo total e de cada modelo, lido do run_results.json). Os seeds são
+  carregados antes com 'dbt seed', fora da medição: não mudam com o
+  tamanho. Ignorada se o dbt não estiver instalado.
+
+Os resultados são acrescentados em data/benchmarks/ingestao.jsonl e o
+resumo mostra o expoente de escala de cada etapa (1.0 = linear).
+
+Uso (a partir da raiz do projeto):
+    python src/load/benchmark.py
+    python src/load/benchmark.py --tamanhos 10000 100000 1000000 10000000 --etapas lake dbt
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from synthetic import generate
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+LOAD_DIR = os.path.dirname(os.path.abspath(__file__))
+DWH_DIR = os.path.join(LOAD_DIR, "..", "..", "dwh")
+TAMANHOS = [10_000, 100_000, 1_000_000]
+ETAPAS = ["lake", "duckdb", "dbt"]
+
+PROFILE = """dwh_imv:
+  target: benchmark
+  outputs:
+    benchmark:
+      type: duckdb
+      path: {path}
+      threads: {threads}
+"""
+
+
+def run_measured(command: list, cwd: str = None):
+    """
+    Executa um comando e retorna (segundos, pico de memória em MB). O pico
+    vem do rusage do filho (ru_maxrss de wait4): o maior pico entre ele e os
+    processos que ele esperou, não a soma. Com um pool de N processos a
+    memória total pode chegar a perto de N vezes esse valor.
+
+    Args:
+        - command (list): Comando e argumentos
+        - cwd (str): Pasta de execução
+    """
+    inicio = time.perf_counter()
+    # O dbt escreve os erros na saída padrão
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    saida = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    segundos = time.perf_counter() - inicio
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} falhou: {saida.decode(errors='replace')[-2000:]}")
+    return segundos, usage.ru_maxrss / 1024
+
+
+def bench_ingestion(raw_dir: str, work_dir: str, destino: str, workers: int):
+    """
+    Mede a ingestão em lote de todos os meses sintéticos em um destino.
+
+    Args:
+        - raw_dir (str): Pasta com os meses sintéticos
+        - work_dir (str): Pasta de trabalho do tamanho
+        - destino (str): 'lake' ou 'duckdb'
+        - workers (int): Processos de leitura
+    """
+    db = os.path.join(work_dir, f"{destino}.duckdb")
+    if os.path.exists(db):
+        os.remove(db)
+    command = [
+        sys.executable, os.path.join(LOAD_DIR, "batch_ingestion.py"),
+        "--raw-dir", raw_dir, "--db", db, "--destino", destino,
+        "--lake-dir", os.path.join(work_dir, "lake", "imoveis"), "--workers", str(workers),
+    ]
+    segundos, rss_mb = run_measured(command)
+    return {'segundos': segundos, 'rss_mb': rss_mb}
+
+
+def bench_dbt(work_dir: str, threads: int):
+    """
+    Mede 'dbt run' sobre o lake do tamanho, em um banco próprio do benchmark.
+
+    Args:
+        - work_dir (str): Pasta de trabalho do tamanho (com o lake gerado)
+        - threads (int): Threads do dbt
+    """
+    db = os.path.join(work_dir, "warehouse.duckdb")
+    if os.path.exists(db):
+        os.remove(db)
+    with open(os.path.join(work_dir, "profiles.yml"), "w") as f:
+        f.write(PROFILE.format(path=db, threads=threads))
+    target = os.path.join(work_dir, "target")
+    options = [
+        "--profiles-dir", work_dir, "--target-path", target,
+        "--vars", json.dumps({'lake_dir': os.path.join(work_dir, "lake")}),
+    ]
+    # O banco é novo a cada rodada: dim_bairro precisa dos seeds
+    run_measured(["dbt", "seed"] + options, cwd=DWH_DIR)
+    segundos, rss_mb = run_measured(["dbt", "run"] + options, cwd=DWH_DIR)
+    with open(os.path.join(target, "run_results.json")) as f:
+        modelos = {
+            result['unique_id'].split(".")[-1]: round(result['execution_time'], 3)
+            for result in json.load(f)['results']
+        }
+    return {'segundos': segundos, 'rss_mb': rss_mb, 'modelos': modelos}
+
+
+def scaling_exponent(points: list):
+    """
+    Inclinação de log(segundos) x log(linhas) por mínimos quadrados.
+
+    Args:
+        - points (list): Pares (linhas, segundos)
+    """
+    if len(points) < 2:
+        return None
+    xs = [math.log(linhas) for linhas, _ in points]
+    ys = [math.log(segundos) for _, segundos in points]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    den = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den if den else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escala da ingestão e do dbt com dados sintéticos.")
+    parser.add_argument("--tamanhos", type=int, nargs="*", default=TAMANHOS, help="Linhas por rodada")
+    parser.add_argument("--etapas", nargs="*", choices=ETAPAS, default=ETAPAS, help="Etapas medidas")
+    parser.add_argument("--pasta", default="data/synthetic", help="Pasta dos dados sintéticos")
+    parser.add_argument("--saida", default="data/benchmarks/ingestao.jsonl", help="Arquivo de resultados")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processos de leitura")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador")
+    args = parser.parse_args()
+
+    etapas = list(args.etapas)
+    if "dbt" in etapas and shutil.which("dbt") is None:
+        logging.warning("dbt não encontrado no PATH, etapa 'dbt' ignorada.")
+        etapas.remove("dbt")
+    if "dbt" in etapas and "lake" not in etapas:
+        etapas.insert(0, "lake")
+
+    os.makedirs(os.path.dirname(args.saida) or ".", exist_ok=True)
+    executado_em = datetime.now().isoformat(timespec="seconds")
+    curves = {}
+    for tamanho in sorted(args.tamanhos):
+        work_dir = os.path.abspath(os.path.join(args.pasta, str(tamanho)))
+        raw_dir = os.path.join(work_dir, "raw")
+        shutil.rmtree(raw_dir, ignore_errors=True)
+        generate(tamanho, raw_dir, seed=args.seed)
+        tamanho_mb = sum(
+            os.path.getsize(os.path.join(root, file))
+            for root, _, files in os.walk(raw_dir) for file in files
+        ) / 1e6
+
+        for etapa in etapas:
+            if etapa == "dbt":
+                result = bench_dbt(work_dir, args.workers)
+            else:
+                result = bench_ingestion(raw_dir, work_dir, etapa, args.workers)
+            result = {
+                'executado_em': executado_em, 'etapa': etapa, 'linhas': tamanho,
+                'tamanho_mb': round(tamanho_mb, 1), 'segundos': round(result['segundos'], 3),
+                'linhas_por_s': round(tamanho / result['segundos']), 'rss_mb': round(result['rss_mb'], 1),
+                **({'modelos': result['modelos']} if 'modelos' in result else {}),
+            }
+            with open(args.saida, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            curves.setdefault(etapa, []).append((tamanho, result['segundos']))
+            logging.info(
+                f"{etapa} | {tamanho} linhas ({tamanho_mb:.0f} MB): {result['segundos']:.2f}s | "
+                f"{result['linhas_por_s']:,} linhas/s | pico {result['rss_mb']:.0f} MB"
+            )
+
+    for etapa, points in curves.items():
+        expoente = scaling_exponent(points)
+        if expoente is not None:
+            logging.info(f"{etapa}: tempo ~ linhas^{expoente:.2f}")
+    logging.info(f"Resultados salvos em '{args.saida}'.")
+
+
+if __name__ == "__main__":
+    main()
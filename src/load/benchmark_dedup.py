@@ -0,0 +1,132 @@
+"""
+Benchmark da deduplicação da silver e da gold: a versão anterior (id
+SHA256 em texto e ROW_NUMBER() por janela, na silver e de novo na gold)
+contra a atual (id UBIGINT com os 64 primeiros bits do SHA256, como a macro
+chave_anuncio, e ARG_MAX/ARG_MIN em uma agregação).
+
+Cada versão roda em um subprocesso sobre o mesmo lake, com o tempo de
+cada etapa e o pico de memória do processo.
+
+Uso (a partir da raiz do projeto):
+    python src/load/benchmark_dedup.py
+    python src/load/benchmark_dedup.py --lake data/synthetic/1000000/lake
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import duckdb
+
+from benchmark import run_measured
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+FILTROS = """
+    preco > 65000
+    AND quartos BETWEEN 1 AND 10
+    AND banheiros BETWEEN 1 AND 10
+    AND vagas BETWEEN 1 AND 10
+    AND area BETWEEN 30 AND 1000"""
+
+# Mesma expressão da macro chave_anuncio do dbt
+ID_ESTAVEL = """('0x' || LEFT(SHA256(CONCAT_WS('|', origem, tipo, COALESCE(localizacao, ''), area, quartos,
+    banheiros, vagas, CAST(preco AS DECIMAL(18, 2)))), 16))::UBIGINT"""
+
+COLUNAS = """origem, date_ref, tipo, localizacao, area, area_max, quartos, quartos_max,
+    banheiros, banheiros_max, vagas, vagas_max, preco, COALESCE(condo, 0) AS condo"""
+
+VARIANTES = {
+    'antes': {
+        'silver': f"""
+            WITH clean AS (
+                SELECT SHA256(CONCAT(origem, tipo, localizacao, area, quartos, banheiros, vagas, preco)) AS id, {COLUNAS}
+                FROM bronze
+            ), deduplication AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY id, date_ref ORDER BY preco DESC) AS row_num
+                FROM clean
+            )
+            SELECT * EXCLUDE (row_num) FROM deduplication WHERE row_num = 1 AND {FILTROS}""",
+        'gold': """
+            SELECT * EXCLUDE (row_num)
+            FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY id ORDER BY preco DESC) AS row_num FROM silver)
+            WHERE row_num = 1""",
+    },
+    'depois': {
+        'silver': f"""
+            WITH clean AS (
+                SELECT {ID_ESTAVEL} AS id, {COLUNAS}
+                FROM bronze
+                WHERE {FILTROS}
+            )
+            SELECT anuncio.* FROM (SELECT ARG_MAX(clean, preco) AS anuncio FROM clean GROUP BY id, date_ref)""",
+        'gold': """
+            SELECT anuncio.* FROM (SELECT ARG_MIN(silver, date_ref) AS anuncio FROM silver GROUP BY id)""",
+    },
+}
+
+
+def run_variant(variante: str, lake: str, resultado: str):
+    """
+    Executa as etapas de uma versão da deduplicação e grava os tempos em JSON.
+
+    Args:
+        - variante (str): 'antes' ou 'depois'
+        - lake (str): Pasta do lake (com imoveis/date_ref=.../origem=.../)
+        - resultado (str): Arquivo JSON de saída
+    """
+    tempos = {}
+    with duckdb.connect() as conn:
+        conn.execute(
+            f"CREATE TABLE bronze AS SELECT * FROM read_parquet('{lake}/imoveis/*/*/*.parquet', "
+            "hive_partitioning = true, union_by_name = true, hive_types_autocast = false)"
+        )
+        for etapa, sql in VARIANTES[variante].items():
+            inicio = time.perf_counter()
+            conn.execute(f"CREATE TABLE {etapa} AS {sql}")
+            tempos[etapa] = time.perf_counter() - inicio
+        tempos['linhas'] = conn.execute("SELECT COUNT(*) FROM gold").fetchone()[0]
+    with open(resultado, "w") as f:
+        json.dump(tempos, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a deduplicação anterior com a atual.")
+    parser.add_argument("--lake", default="data/lake", help="Pasta do lake")
+    parser.add_argument("--variante", choices=list(VARIANTES), help=argparse.SUPPRESS)
+    parser.add_argument("--resultado", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variante:
+        run_variant(args.variante, args.lake, args.resultado)
+        return
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for variante in VARIANTES:
+            resultado = os.path.join(tmp, f"{variante}.json")
+            command = [sys.executable, os.path.abspath(__file__), "--lake", os.path.abspath(args.lake),
+                       "--variante", variante, "--resultado", resultado]
+            _, rss_mb = run_measured(command)
+            with open(resultado) as f:
+                resultados[variante] = {**json.load(f), 'rss_mb': rss_mb}
+
+    for variante, tempos in resultados.items():
+        logging.info(
+            f"{variante}: silver {tempos['silver']:.2f}s | gold {tempos['gold']:.2f}s | "
+            f"pico {tempos['rss_mb']:.0f} MB | {tempos['linhas']} linhas na gold"
+        )
+    antes, depois = resultados['antes'], resultados['depois']
+    for etapa in ('silver', 'gold', 'rss_mb'):
+        logging.info(f"{etapa}: {(1 - depois[etapa] / antes[etapa]) * 100:.0f}% menor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Perfil de cada modelo do dbt a cada build, gravado em ops.build_metrics.
+
+O 'dbt run' roda em um subprocesso com logs em JSON: a cada início e fim
+de modelo (eventos LogStartLine e LogModelResult) são lidos, do processo do
+dbt, o pico de memória (VmHWM em /proc, zerado no início de cada modelo) e
+os bytes lidos (rchar em /proc/<pid>/io). Com --threads 1 (padrão) os
+modelos rodam um de cada vez e a memória e os bytes são só do modelo; com
+mais threads os valores incluem os modelos que rodaram ao mesmo tempo.
+
+/proc é lido quando este processo recebe a linha do log, não no instante
+em que o modelo termina: com o dbt já no modelo seguinte, os bytes e o
+pico podem incluir o começo dele. O erro é pequeno em modelos longos e
+pode dominar em modelos de milissegundos.
+
+As linhas de cada tabela são contadas antes e depois do build:
+linhas_total é o tamanho da tabela depois do build e linhas_gravadas as
+linhas deste build. Para tabelas é o total (são recriadas); para modelos
+incrementais, o rows_affected informado pelo adapter ou, sem ele, o saldo
+depois - antes (um mês reprocessado com delete+insert conta só a
+diferença). Views não gravam linhas.
+
+Em um banco sem os seeds (dwh/seeds), 'dbt seed' roda antes do build,
+fora da medição.
+
+O relatório compara o último build de cada modelo com a mediana dos
+--janela builds anteriores e aponta os que ficaram mais de --limiar mais
+lentos, mais pesados em memória ou lendo mais bytes. Fora do Linux, a
+memória e os bytes ficam vazios.
+
+Uso (a partir da raiz do projeto):
+    python src/load/build_metrics.py
+    python src/load/build_metrics.py --select silver_imoveis+ --limiar 0.3
+    python src/load/build_metrics.py --relatorio
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import time
+from datetime import datetime
+
+import duckdb
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+DWH_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "dwh"))
+SEEDS_DIR = os.path.join(DWH_DIR, "seeds")
+METRICS_TABLE = "ops.build_metrics"
+
+
+def create_metrics_table(conn: duckdb.DuckDBPyConnection):
+    """
+    Cria a tabela com o perfil de cada modelo em cada build do dbt
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+    """
+    conn.execute("CREATE SCHEMA IF NOT EXISTS ops")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+            build_id VARCHAR,
+            executado_em TIMESTAMP,
+            modelo VARCHAR,
+            materializacao VARCHAR,
+            status VARCHAR,
+            segundos DOUBLE,
+            linhas_total BIGINT,
+            bytes_lidos BIGINT,
+            pico_rss_mb DOUBLE,
+            threads INTEGER,
+            linhas_gravadas BIGINT
+        )
+    """)
+    # Tabelas da versão anterior, com a contagem total em 'linhas'
+    columns = [row[0] for row in conn.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = 'ops' AND table_name = 'build_metrics'"
+    ).fetchall()]
+    if 'linhas' in columns:
+        conn.execute(f"ALTER TABLE {METRICS_TABLE} RENAME COLUMN linhas TO linhas_total")
+    if 'linhas_gravadas' not in columns:
+        conn.execute(f"ALTER TABLE {METRICS_TABLE} ADD COLUMN linhas_gravadas BIGINT")
+        # Tabelas são recriadas a cada build: o total é o que foi gravado
+        conn.execute(f"UPDATE {METRICS_TABLE} SET linhas_gravadas = linhas_total WHERE materializacao = 'table'")
+
+
+def table_counts(conn: duckdb.DuckDBPyConnection):
+    """
+    Linhas de cada tabela do banco, por (schema, tabela), para comparar
+    antes e depois de um build.
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+    """
+    tables = conn.execute(
+        "SELECT table_schema, table_name FROM information_schema.tables "
+        "WHERE table_type = 'BASE TABLE' AND table_catalog = current_database()"
+    ).fetchall()
+    return {
+        (schema, table): conn.execute(f'SELECT COUNT(*) FROM "{schema}"."{table}"').fetchone()[0]
+        for schema, table in tables
+    }
+
+
+def missing_seeds(conn: duckdb.DuckDBPyConnection):
+    """
+    Seeds de dwh/seeds que ainda não existem no banco.
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+    """
+    seeds = {os.path.splitext(file)[0] for file in os.listdir(SEEDS_DIR) if file.endswith(".csv")}
+    tables = {row[0] for row in conn.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+    return sorted(seeds - tables)
+
+
+def run_seed(seeds: list, profiles_dir: str = None):
+    """
+    Executa 'dbt seed' para os seeds informados.
+
+    Args:
+        - seeds (list): Seeds a carregar
+        - profiles_dir (str): Pasta do profiles.yml (padrão do dbt se vazio)
+    """
+    command = ["dbt", "seed", "--select"] + list(seeds) + (["--profiles-dir", profiles_dir] if profiles_dir else [])
+    logging.info(f"Executando '{' '.join(command)}'.")
+    process = subprocess.run(command, cwd=DWH_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} falhou: {process.stdout.decode(errors='replace')[-2000:]}")
+
+
+def read_proc(pid: int, file: str, field: str):
+    """
+    Valor numérico de um campo de /proc/<pid>/<file> (None fora do Linux
+    ou se o processo já terminou).
+
+    Args:
+        - pid (int): Processo
+        - file (str): 'status' ou 'io'
+        - field (str): Campo (ex: 'VmHWM', 'rchar')
+    """
+    try:
+        with open(f"/proc/{pid}/{file}") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def reset_peak(pid: int):
+    """
+    Zera o pico de memória (VmHWM) do processo, para medir só o próximo modelo.
+
+    Args:
+        - pid (int): Processo
+    """
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def profile_run(dbt_args: list, threads: int = 1, profiles_dir: str = None):
+    """
+    Executa 'dbt run' e retorna (build_id, modelos, returncode), com
+    segundos, status, bytes lidos, pico de memória, relação e linhas
+    afetadas (se o adapter informar) de cada modelo.
+
+    Args:
+        - dbt_args (list): Argumentos extras do 'dbt run' (ex: ['--select', 'obt_imoveis+'])
+        - threads (int): Threads do dbt
+        - profiles_dir (str): Pasta do profiles.yml (padrão do dbt se vazio)
+    """
+    command = ["dbt", "--log-format", "json", "run", "--threads", str(threads)] + list(dbt_args)
+    if profiles_dir:
+        command += ["--profiles-dir", profiles_dir]
+    logging.info(f"Executando '{' '.join(command)}'.")
+    process = subprocess.Popen(command, cwd=DWH_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, env={**os.environ, "PYTHONUNBUFFERED": "1"})
+    build_id, modelos, inicio, saida = None, {}, {}, []
+    for line in process.stdout:
+        saida.append(line)
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        name, data = event['info']['name'], event.get('data', {})
+        build_id = build_id or event['info'].get('invocation_id')
+        node = data.get('node_info', {})
+        if name == "LogStartLine" and node.get('resource_type') == "model":
+            reset_peak(process.pid)
+            inicio[node['unique_id']] = read_proc(process.pid, "io", "rchar")
+        elif name == "LogModelResult":
+            lidos = read_proc(process.pid, "io", "rchar")
+            pico = read_proc(process.pid, "status", "VmHWM")
+            antes = inicio.get(node['unique_id'])
+            relation = node.get('node_relation', {})
+            modelos.setdefault(node['node_name'], {}).update({
+                'materializacao': node.get('materialized'),
+                'status': data.get('status'),
+                'segundos': data.get('execution_time'),
+                'bytes_lidos': lidos - antes if lidos is not None and antes is not None else None,
+                'pico_rss_mb': pico / 1024 if pico is not None else None,
+                'relacao': (relation.get('schema'), relation.get('alias')),
+            })
+        elif name == "NodeFinished" and node.get('resource_type') == "model":
+            response = data.get('run_result', {}).get('adapter_response', {})
+            modelos.setdefault(node['node_name'], {})['linhas_afetadas'] = response.get('rows_affected')
+    process.wait()
+    if process.returncode != 0:
+        logging.error("".join(saida[-20:]))
+    return build_id, modelos, process.returncode
+
+
+def record_build(conn: duckdb.DuckDBPyConnection, build_id: str, modelos: dict, threads: int, antes: dict):
+    """
+    Conta as linhas de cada modelo e grava o build em ops.build_metrics
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - build_id (str): invocation_id do dbt
+        - modelos (dict): Resultado de profile_run
+        - threads (int): Threads do dbt
+        - antes (dict): table_counts antes do build
+    """
+    create_metrics_table(conn)
+    executado_em = datetime.now()
+    depois = table_counts(conn)
+    for modelo, perfil in modelos.items():
+        if 'status' not in perfil:
+            continue
+        total = depois.get(perfil['relacao'])
+        if perfil['materializacao'] == "incremental":
+            gravadas = perfil.get('linhas_afetadas')
+            if gravadas is None or gravadas < 0:
+                gravadas = total - antes.get(perfil['relacao'], 0) if total is not None else None
+        else:
+            gravadas = total
+        conn.execute(
+            f"INSERT INTO {METRICS_TABLE} (build_id, executado_em, modelo, materializacao, status, segundos, "
+            "linhas_total, linhas_gravadas, bytes_lidos, pico_rss_mb, threads) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [build_id, executado_em, modelo, perfil['materializacao'], perfil['status'], perfil['segundos'],
+             total, gravadas, perfil['bytes_lidos'], perfil['pico_rss_mb'], threads],
+        )
+    logging.info(f"Build {build_id}: {len(modelos)} modelos gravados em {METRICS_TABLE}.")
+
+
+def regression_report(conn: duckdb.DuckDBPyConnection, limiar: float = 0.5, janela: int = 5):
+    """
+    Compara o último build bem-sucedido de cada modelo com a mediana dos
+    'janela' builds anteriores. Retorna um DataFrame com a variação de
+    tempo, memória, bytes e linhas e a coluna 'regrediu'.
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - limiar (float): Aumento tolerado sobre a base (0.5 = 50%)
+        - janela (int): Builds anteriores usados como base
+    """
+    create_metrics_table(conn)
+    return conn.execute(f"""
+        WITH historico AS (
+            SELECT
+                *
+                , ROW_NUMBER() OVER (PARTITION BY modelo ORDER BY executado_em DESC) AS ordem
+            FROM {METRICS_TABLE}
+            WHERE status = 'OK'
+        ), base AS (
+            SELECT
+                modelo
+                , COUNT(*) AS builds_base
+                , MEDIAN(segundos) AS segundos
+                , MEDIAN(pico_rss_mb) AS pico_rss_mb
+                , MEDIAN(bytes_lidos) AS bytes_lidos
+                , MEDIAN(linhas_gravadas) AS linhas_gravadas
+            FROM historico
+            WHERE ordem BETWEEN 2 AND ? + 1
+            GROUP BY modelo
+        ), variacao AS (
+            SELECT
+                ultimo.modelo
+                , ultimo.executado_em
+                , base.builds_base
+                , ultimo.segundos
+                , ROUND(ultimo.segundos / NULLIF(base.segundos, 0) - 1, 3) AS var_segundos
+                , ultimo.pico_rss_mb
+                , ROUND(ultimo.pico_rss_mb / NULLIF(base.pico_rss_mb, 0) - 1, 3) AS var_pico_rss
+                , ultimo.bytes_lidos
+                , ROUND(ultimo.bytes_lidos / NULLIF(base.bytes_lidos, 0) - 1, 3) AS var_bytes_lidos
+                , ultimo.linhas_gravadas
+                , ROUND(ultimo.linhas_gravadas / NULLIF(base.linhas_gravadas, 0) - 1, 3) AS var_linhas
+            FROM historico ultimo
+            JOIN base USING (modelo)
+            WHERE ultimo.ordem = 1
+        )
+        SELECT
+            *
+            , COALESCE(GREATEST(var_segundos, var_pico_rss, var_bytes_lidos) > ?, FALSE) AS regrediu
+        FROM variacao
+        ORDER BY regrediu DESC, var_segundos DESC
+    """, [janela, limiar]).df()
+
+
+def log_report(report, limiar: float):
+    """
+    Mostra o relatório de regressões no log.
+
+    Args:
+        - report (pd.DataFrame): Resultado de regression_report
+        - limiar (float): Aumento tolerado sobre a base
+    """
+    if report.empty:
+        logging.info("Sem builds anteriores para comparar.")
+        return
+    # Métricas ausentes (fora do Linux, views) vêm como NaN do DataFrame
+    for row in report.fillna(0).itertuples():
+        mensagem = (
+            f"{row.modelo}: {row.segundos:.2f}s ({row.var_segundos:+.0%}) | "
+            f"pico {row.pico_rss_mb:.0f} MB ({row.var_pico_rss:+.0%}) | "
+            f"bytes lidos {row.var_bytes_lidos:+.0%} | linhas gravadas {row.var_linhas:+.0%} "
+            f"| base: {row.builds_base} builds"
+        )
+        if row.regrediu:
+            logging.warning(f"REGRESSÃO acima de {limiar:.0%} - {mensagem}")
+        else:
+            logging.info(mensagem)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil por modelo do dbt run e relatório de regressões.")
+    parser.add_argument("--db", default="data/database.duckdb", help="Banco de dados DuckDB")
+    parser.add_argument("--select", nargs="*", help="Modelos do dbt (sintaxe do --select)")
+    parser.add_argument("--threads", type=int, default=1, help="Threads do dbt")
+    parser.add_argument("--profiles-dir", help="Pasta do profiles.yml do dbt")
+    parser.add_argument("--limiar", type=float, default=0.5, help="Aumento tolerado sobre a base (0.5 = 50%%)")
+    parser.add_argument("--janela", type=int, default=5, help="Builds anteriores usados como base")
+    parser.add_argument("--relatorio", action="store_true", help="Só mostra o relatório, sem rodar o dbt")
+    args = parser.parse_args()
+
+    returncode = 0
+    if not args.relatorio:
+        with duckdb.connect(args.db) as conn:
+            seeds = missing_seeds(conn)
+        if seeds:
+            run_seed(seeds, args.profiles_dir)
+        with duckdb.connect(args.db) as conn:
+            antes = table_counts(conn)
+        inicio = time.perf_counter()
+        build_id, modelos, returncode = profile_run(
+            ["--select"] + args.select if args.select else [], args.threads, args.profiles_dir
+        )
+        logging.info(f"dbt run concluído em {time.perf_counter() - inicio:.2f}s.")
+        with duckdb.connect(args.db) as conn:
+            record_build(conn, build_id, modelos, args.threads, antes)
+
+    with duckdb.connect(args.db) as conn:
+        log_report(regression_report(conn, args.limiar, args.janela), args.limiar)
+    if returncode != 0:
+        raise SystemExit(returncode)
+
+
+if __name__ == "__main__":
+    main()
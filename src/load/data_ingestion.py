@@ -1,7 +1,14 @@
+import argparse
 import duckdb
+import hashlib
 import pandas as pd
+import pyarrow as pa
 import logging
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from extract.normalize import SCHEMA, normalize_sql, normalize_table
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,7 +19,8 @@ logging.basicConfig(
 
 def load_data(file_path: str, origem: str, date_ref: str):
     """
-    Carrega arquivos .JSON em um pd.DataFrame
+    Carrega arquivos .JSON em um pd.DataFrame, com os campos normalizados
+    para os tipos do warehouse (ver extract/normalize.py)
 
     Args:
         - file_path (str): Caminho do arquivo .JSON
@@ -20,9 +28,12 @@ def load_data(file_path: str, origem: str, date_ref: str):
         - date_ref (str): Data de referência da raspagem ('YYYY-MM')
     """
     try:
-        df = pd.read_json(file_path)
+        raw = pd.read_json(file_path, dtype=False)
+        table = normalize_table(pa.Table.from_pandas(raw, preserve_index=False))
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
         df['origem'] = origem
         df['date_ref'] = date_ref
+        df['arquivo'] = os.path.basename(file_path)
         logging.info(f"Carregamento do arquivo '{file_path}' concluído.")
         return df
     except Exception as e:
@@ -44,10 +55,10 @@ def save_table(df: pd.DataFrame,
     """
     try:
         conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
-        conn.execute(f"DROP TABLE IF EXISTS {schema_name}.{table_name}")
 
+        # CREATE OR REPLACE troca a tabela de uma vez: em caso de erro a anterior é mantida
         conn.register("tmp_df", df)
-        conn.execute(f"CREATE TABLE {schema_name}.{table_name} AS SELECT * FROM tmp_df")
+        conn.execute(f"CREATE OR REPLACE TABLE {schema_name}.{table_name} AS SELECT * FROM tmp_df")
 
         logging.info(f"Tabela {schema_name}.{table_name} salva no banco de dados.")
         logging.info(f"{len(df)} linhas inseridas.")
@@ -70,7 +81,254 @@ def get_origin(file_name: str, name_map: dict):
     return "Origem Desconhecida"
 
 
+def origin_sql(column: str, name_map: dict):
+    """
+    Expressão SQL equivalente a get_origin sobre uma coluna com o nome do arquivo
+
+    Args:
+        - column (str): Coluna (ou expressão) com o caminho do arquivo
+        - name_map (dict): Dicionário com os nomes
+    """
+    cases = " ".join(
+        f"WHEN CONTAINS(LOWER(PARSE_FILENAME({column})), '{chave}') THEN '{origem}'"
+        for chave, origem in name_map.items()
+    )
+    return f"CASE {cases} ELSE 'Origem Desconhecida' END"
+
+
+MANIFEST_TABLE = "ops.ingestion_manifest"
+
+
+def raw_select(pattern: str, date_ref: str, name_map: dict):
+    """
+    SELECT que lê arquivos .JSON pelo DuckDB, já normalizados e com as
+    colunas 'origem', 'date_ref' e 'arquivo' (nome do arquivo de origem)
+
+    Args:
+        - pattern (str): Caminho ou glob dos arquivos .JSON
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - name_map (dict): Dicionário com os nomes das origens
+    """
+    pattern = pattern.replace("'", "''")
+    columns = ", ".join(f"'{name}': 'VARCHAR'" for name in SCHEMA.names)
+    return f"""
+        SELECT
+            {", ".join(normalize_sql())},
+            {origin_sql("filename", name_map)} AS origem,
+            '{date_ref.replace("'", "''")}' AS date_ref,
+            PARSE_FILENAME(filename) AS arquivo
+        FROM read_json('{pattern}', format = 'array', columns = {{{columns}}}, filename = true)
+    """
+
+
+def file_hash(file_path: str):
+    """
+    SHA256 do conteúdo do arquivo, lido em blocos
+
+    Args:
+        - file_path (str): Caminho do arquivo
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def create_manifest(conn: duckdb.DuckDBPyConnection):
+    """
+    Cria a tabela de controle da ingestão incremental: um registro por
+    arquivo ingerido em cada destino (tabela do DuckDB ou partição do lake),
+    com tamanho, hash do conteúdo e linhas carregadas
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+    """
+    conn.execute("CREATE SCHEMA IF NOT EXISTS ops")
+    # Manifestos anteriores tinham só 'arquivo' como chave: a ingestão no lake
+    # e a incremental no DuckDB sobrescreviam o registro uma da outra
+    chave = conn.execute(
+        "SELECT constraint_column_names FROM duckdb_constraints() WHERE schema_name = 'ops' "
+        "AND table_name = 'ingestion_manifest' AND constraint_type = 'PRIMARY KEY'"
+    ).fetchone()
+    antigo = chave is not None and list(chave[0]) == ['arquivo']
+    if antigo:
+        conn.execute(f"ALTER TABLE {MANIFEST_TABLE} RENAME TO ingestion_manifest_antigo")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            arquivo VARCHAR,
+            tabela VARCHAR,
+            origem VARCHAR,
+            date_ref VARCHAR,
+            tamanho BIGINT,
+            hash VARCHAR,
+            linhas BIGINT,
+            ingerido_em TIMESTAMP,
+            PRIMARY KEY (arquivo, tabela)
+        )
+    """)
+    if antigo:
+        conn.execute(f"INSERT INTO {MANIFEST_TABLE} SELECT * FROM ops.ingestion_manifest_antigo")
+        conn.execute("DROP TABLE ops.ingestion_manifest_antigo")
+
+
+def record_file(conn: duckdb.DuckDBPyConnection, file_path: str, tabela: str,
+                origem: str, date_ref: str, file_digest: str, linhas: int):
+    """
+    Registra (ou atualiza) um arquivo ingerido em uma tabela no manifesto
+
+    Args:
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - file_path (str): Caminho do arquivo .JSON
+        - tabela (str): Tabela que recebeu as linhas ('schema.tabela')
+        - origem (str): Site onde os dados foram raspados
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - file_digest (str): Hash do conteúdo do arquivo
+        - linhas (int): Linhas carregadas a partir do arquivo
+    """
+    conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE arquivo = ? AND tabela = ?", [file_path, tabela])
+    conn.execute(
+        f"INSERT INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+        [file_path, tabela, origem, date_ref, os.path.getsize(file_path), file_digest, linhas],
+    )
+
+
+def list_files(folder: str):
+    """
+    Lista os arquivos .JSON da pasta, em ordem
+
+    Args:
+        - folder (str): Pasta com os arquivos .JSON
+    """
+    return sorted(
+        os.path.normpath(os.path.join(folder, file))
+        for file in os.listdir(folder)
+        if file.endswith(".json")
+    )
+
+
+def ingest_files(folder: str,
+                 date_ref: str,
+                 schema_name: str,
+                 table_name: str,
+                 conn: duckdb.DuckDBPyConnection,
+                 name_map: dict):
+    """
+    Ingere todos os arquivos .JSON da pasta direto pelo DuckDB, em uma única
+    instrução: read_json sobre o glob, normalização em SQL, 'origem' pelo
+    nome do arquivo e 'date_ref'. Os dados não passam pelo pandas, então o
+    uso de memória não cresce com a quantidade de arquivos. O manifesto da
+    ingestão incremental é refeito para os arquivos da pasta.
+
+    Args:
+        - folder (str): Pasta com os arquivos .JSON
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - schema_name (str): Schema onde a tabela será salva
+        - table_name (str): Nome da tabela onde os dados serão ingeridos
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - name_map (dict): Dicionário com os nomes das origens
+    """
+    tabela = f"{schema_name}.{table_name}"
+    files = list_files(folder)
+    digests = {file: file_hash(file) for file in files}
+    try:
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
+        create_manifest(conn)
+        conn.execute(f"CREATE OR REPLACE TABLE {tabela} AS {raw_select(os.path.join(folder, '*.json'), date_ref, name_map)}")
+        counts = dict(conn.execute(f"SELECT arquivo, COUNT(*) FROM {tabela} GROUP BY arquivo").fetchall())
+        conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE tabela = ?", [tabela])
+        for file in files:
+            name = os.path.basename(file)
+            record_file(conn, file, tabela, get_origin(name, name_map), date_ref, digests[file], counts.get(name, 0))
+        conn.execute("COMMIT")
+        logging.info(f"Tabela {tabela} salva no banco de dados.")
+        logging.info(f"{sum(counts.values())} linhas inseridas.")
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        logging.error(f"Erro ao ingerir '{folder}': {e}", exc_info=True)
+        raise
+
+
+def ingest_incremental(folder: str,
+                       date_ref: str,
+                       schema_name: str,
+                       table_name: str,
+                       conn: duckdb.DuckDBPyConnection,
+                       name_map: dict):
+    """
+    Ingestão idempotente guiada pelo manifesto (ops.ingestion_manifest).
+
+    Arquivos com o mesmo tamanho e hash já registrados são ignorados. Cada
+    arquivo novo ou alterado substitui apenas a sua fatia da tabela do mês
+    (linhas com o mesmo 'arquivo'), em uma transação própria: se algo
+    falhar, a tabela e o manifesto continuam como antes. Arquivos removidos
+    da pasta têm a fatia e o registro apagados.
+
+    Args:
+        - folder (str): Pasta com os arquivos .JSON
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - schema_name (str): Schema onde a tabela será salva
+        - table_name (str): Nome da tabela onde os dados serão ingeridos
+        - conn (duckdb.DuckDBPyConnection): Conexão com banco de dados DuckDB
+        - name_map (dict): Dicionário com os nomes das origens
+    """
+    tabela = f"{schema_name}.{table_name}"
+    conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
+    create_manifest(conn)
+
+    columns = [row[0] for row in conn.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = ? AND table_name = ?",
+        [schema_name, table_name],
+    ).fetchall()]
+    if columns and "arquivo" not in columns:
+        logging.info(f"Tabela {tabela} criada sem a coluna 'arquivo': refazendo a carga completa.")
+        ingest_files(folder, date_ref, schema_name, table_name, conn, name_map)
+        return
+    if not columns:
+        conn.execute(f"CREATE TABLE {tabela} AS {raw_select(os.path.join(folder, '*.json'), date_ref, name_map)} LIMIT 0")
+
+    manifest = {
+        arquivo: (tamanho, digest)
+        for arquivo, tamanho, digest in conn.execute(
+            f"SELECT arquivo, tamanho, hash FROM {MANIFEST_TABLE} WHERE tabela = ?", [tabela]
+        ).fetchall()
+    }
+    files = list_files(folder)
+
+    for file in files:
+        name = os.path.basename(file)
+        digest = file_hash(file)
+        if manifest.get(file) == (os.path.getsize(file), digest):
+            logging.info(f"Arquivo '{file}' sem alterações, ignorado.")
+            continue
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            conn.execute(f"DELETE FROM {tabela} WHERE arquivo = ?", [name])
+            linhas = conn.execute(f"INSERT INTO {tabela} BY NAME {raw_select(file, date_ref, name_map)}").fetchone()[0]
+            record_file(conn, file, tabela, get_origin(name, name_map), date_ref, digest, linhas)
+            conn.execute("COMMIT")
+            logging.info(f"Arquivo '{file}': {linhas} linhas substituídas em {tabela}.")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logging.error(f"Erro ao ingerir '{file}': {e}", exc_info=True)
+            raise
+
+    for file in sorted(set(manifest) - set(files)):
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute(f"DELETE FROM {tabela} WHERE arquivo = ?", [os.path.basename(file)])
+        conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE arquivo = ? AND tabela = ?", [file, tabela])
+        conn.execute("COMMIT")
+        logging.info(f"Arquivo '{file}' removido da pasta: linhas apagadas de {tabela}.")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Ingestão dos arquivos .json raspados no DuckDB.")
+    parser.add_argument("--modo", choices=["duckdb", "incremental", "pandas"], default="duckdb",
+                        help="duckdb: leitura nativa dos arquivos (padrão); incremental: só arquivos novos "
+                             "ou alterados, pelo manifesto; pandas: carrega tudo em DataFrames")
+    args = parser.parse_args()
+
     file_path = input("Insira o caminho da pasta com os arquivos.json: ").strip()
     date_ref = input("Insira a data de referência da extração no formato YYYY-MM: ").strip()
 
@@ -80,30 +338,35 @@ def main():
         "zap": "ZAP Imóveis"
     }
 
-    files = [
-        os.path.join(file_path, file)
-        for file in os.listdir(file_path)
-        if file.endswith(".json")
-    ]
+    conn = duckdb.connect("data/database.duckdb")
+    logging.info("Conexão com banco de dados iniciada.")
 
-    dataframes = []
-    for file in files:
-        file_name = os.path.basename(file)
-        origem = get_origin(file_name, origens)
+    table_name = os.path.basename(file_path).split("-")[0]
 
-        try:
-            df = load_data(file, origem, date_ref)
-            dataframes.append(df)
-        except Exception:
-            raise
+    if args.modo == "duckdb":
+        ingest_files(file_path, date_ref, "imoveis_2025", table_name, conn, origens)
+    elif args.modo == "incremental":
+        ingest_incremental(file_path, date_ref, "imoveis_2025", table_name, conn, origens)
+    else:
+        files = [
+            os.path.join(file_path, file)
+            for file in os.listdir(file_path)
+            if file.endswith(".json")
+        ]
 
-    df_final = pd.concat(dataframes, ignore_index=True)
+        dataframes = []
+        for file in files:
+            file_name = os.path.basename(file)
+            origem = get_origin(file_name, origens)
 
-    conn = duckdb.connect("data/database.duckdb")
-    logging.info("Conexão com banco de dados iniciada.")
+            try:
+                df = load_data(file, origem, date_ref)
+                dataframes.append(df)
+            except Exception:
+                raise
 
-    table_name = os.path.basename(file_path).split("-")[0]
-    save_table(df_final, "imoveis_2025", table_name, conn)
+        df_final = pd.concat(dataframes, ignore_index=True)
+        save_table(df_final, "imoveis_2025", table_name, conn)
 
     logging.info("Ingestão de dados concluída.")
     logging.info("Conexão com o banco de dados encerrada.")
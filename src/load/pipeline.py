@@ -0,0 +1,465 @@
+"""
+Atualização mensal completa, sem agendador externo: raspagem -> ingestão
+no lake -> dbt.
+
+- raspagem: as três spiders rodam ao mesmo tempo, cada uma em um processo
+  'scrapy crawl' gravando data/raw/<mes>-<ano>/<spider>.json (o arquivo só
+  é substituído se a raspagem terminar sem erro). Um portal que já tem o
+  arquivo do mês não é raspado de novo, a menos que se use --reraspar.
+  Cada spider descarta as próprias repetições (DedupPipeline) e grava a
+  telemetria em um banco só seu (data/telemetry/crawl_<spider>.duckdb),
+  copiado para ops.crawl_metrics quando as raspagens terminam;
+- deduplicação entre portais: como as spiders rodam juntas, nenhuma vê os
+  índices das outras; extract.dedup.FeedLinker compara os arquivos do mês
+  na ordem de SPIDERS e regrava só os que mudaram. Um portal é ligado
+  assim que a raspagem dele e a dos portais anteriores termina;
+- ingestão: cada arquivo é ingerido no lake logo depois de ligado,
+  enquanto os portais seguintes ainda raspam. Arquivos com o mesmo hash
+  registrado no manifesto (ops.ingestion_manifest) são ignorados;
+- dbt: só roda o que está abaixo das entradas alteradas desde o último
+  dbt bem-sucedido, comparando hashes de conteúdo (guardados em
+  data/pipeline_state.json): meses do lake cujos arquivos mudaram (a silver
+  é refeita mês a mês e depois a gold), modelos .sql alterados (o modelo e
+  os seus dependentes) e seeds alterados ('dbt seed' e os dependentes).
+  Macros, dbt_project.yml e source.yml alterados rodam o projeto inteiro.
+
+Depois do dbt, o banco é publicado para o dashboard (publish.py). O tempo
+de cada etapa é acrescentado em data/telemetry/pipeline_runs.jsonl e o
+perfil de cada modelo do dbt em ops.build_metrics (build_metrics.py).
+Sem nada novo, a execução só confere hashes e termina em segundos.
+
+Uso (a partir da raiz do projeto):
+    python src/load/pipeline.py
+    python src/load/pipeline.py --date-ref 2025-07 --spiders zap vivareal
+    python src/load/pipeline.py --reraspar -s INCREMENTAL_ENABLED=True
+"""
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import duckdb
+
+from batch_ingestion import MESES, ORIGENS, lake_file, parse_file
+from build_metrics import log_report, profile_run, record_build, regression_report, table_counts
+from publish import publish
+from data_ingestion import MANIFEST_TABLE, create_manifest, file_hash, get_origin, record_file
+from extract import settings as crawl_settings
+from extract.dedup import FeedLinker
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+DWH_DIR = os.path.join(ROOT_DIR, "dwh")
+SPIDERS = ["chaves", "vivareal", "zap"]
+
+# Settings de cada 'scrapy crawl' do runner, antes dos informados com -s:
+# dedup só exata na raspagem (a comparação entre portais é feita depois)
+CRAWL_SETTINGS = ["DEDUP_ENABLED=True", "DEDUP_CROSS_PORTAL=False", "TELEMETRY_ENABLED=True"]
+
+# Entradas do dbt que, se alteradas, exigem rodar o projeto inteiro
+DBT_GLOBAL_INPUTS = ["dbt_project.yml", "macros/*.sql", "models/bronze/source.yml"]
+
+
+def connect(db: str, tentativas: int = 30):
+    """
+    Abre o banco DuckDB, esperando enquanto outro processo o mantém aberto
+    (uma ingestão, um dbt ou uma publicação em andamento).
+
+    Args:
+        - db (str): Banco de dados DuckDB
+        - tentativas (int): Tentativas, uma por segundo
+    """
+    for tentativa in range(tentativas):
+        try:
+            return duckdb.connect(db)
+        except duckdb.IOException:
+            if tentativa == tentativas - 1:
+                raise
+            time.sleep(1)
+
+
+def telemetry_db(db: str, spider: str):
+    """
+    Banco da telemetria de uma spider durante o runner, ao lado do warehouse.
+
+    Args:
+        - db (str): Banco de dados DuckDB do warehouse
+        - spider (str): Nome da spider
+    """
+    return os.path.abspath(os.path.join(os.path.dirname(db), "telemetry", f"crawl_{spider}.duckdb"))
+
+
+def crawl(spider: str, feed: str, date_ref: str, db: str, settings: list):
+    """
+    Roda uma spider em um processo 'scrapy crawl' e publica o feed só se a
+    raspagem terminar sem erro e com anúncios. Retorna os segundos gastos.
+
+    Args:
+        - spider (str): Nome da spider
+        - feed (str): Arquivo .JSON de saída
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - db (str): Banco de dados DuckDB do warehouse
+        - settings (list): Settings extras do Scrapy ('NOME=valor')
+    """
+    os.makedirs(os.path.dirname(feed), exist_ok=True)
+    os.makedirs(os.path.dirname(telemetry_db(db, spider)), exist_ok=True)
+    parcial = f"{feed}.parcial"
+    command = ["scrapy", "crawl", spider, "-O", f"{os.path.abspath(parcial)}:json", "-s", f"DATE_REF={date_ref}"]
+    for setting in CRAWL_SETTINGS + [f"TELEMETRY_DB={telemetry_db(db, spider)}"] + settings:
+        command += ["-s", setting]
+    inicio = time.perf_counter()
+    process = subprocess.run(command, cwd=SRC_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise RuntimeError(f"scrapy crawl {spider} falhou: {process.stderr.decode(errors='replace')[-2000:]}")
+    with open(parcial, encoding="utf-8") as f:
+        vazio = not json.load(f)
+    if vazio:
+        # Portal bloqueado ou fora do ar: mantém o arquivo anterior do mês
+        os.remove(parcial)
+        raise RuntimeError(f"scrapy crawl {spider} terminou sem nenhum anúncio.")
+    os.replace(parcial, feed)
+    return time.perf_counter() - inicio
+
+
+def ready_spiders(ordem: list, pendentes: set):
+    """
+    Remove e retorna, do início de 'ordem', os portais que já podem ser
+    ligados: os que não raspam mais e vêm antes de qualquer raspagem em
+    andamento.
+
+    Args:
+        - ordem (list): Portais ainda não ligados, na ordem de SPIDERS
+        - pendentes (set): Portais com raspagem em andamento
+    """
+    prontos = []
+    while ordem and ordem[0] not in pendentes:
+        prontos.append(ordem.pop(0))
+    return prontos
+
+
+def ingest_feed(feed: str, date_ref: str, lake_dir: str, manifest: dict):
+    """
+    Grava o Parquet da partição quando o hash do arquivo difere do
+    manifesto. Retorna um dicionário com o hash, o resultado de parse_file
+    (ou None) e os segundos gastos.
+
+    Args:
+        - feed (str): Arquivo .JSON do portal no mês
+        - date_ref (str): Data de referência da raspagem ('YYYY-MM')
+        - lake_dir (str): Pasta da tabela no lake ('data/lake/imoveis')
+        - manifest (dict): Manifesto da partição {arquivo: (tamanho, hash)}
+    """
+    inicio = time.perf_counter()
+    digest = file_hash(feed)
+    result = None
+    if manifest.get(feed) == (os.path.getsize(feed), digest):
+        logging.info(f"Arquivo '{feed}' sem alterações, ingestão ignorada.")
+    else:
+        result = parse_file(feed, date_ref, lake_dir)
+    return {'digest': digest, 'result': result, 'segundos': time.perf_counter() - inicio}
+
+
+def merge_telemetry(db: str, spiders: list):
+    """
+    Copia a telemetria gravada por cada spider no próprio banco para
+    ops.crawl_metrics do warehouse e apaga os bancos das spiders.
+
+    Args:
+        - db (str): Banco de dados DuckDB do warehouse
+        - spiders (list): Spiders raspadas
+    """
+    files = [telemetry_db(db, spider) for spider in spiders if os.path.exists(telemetry_db(db, spider))]
+    if not files:
+        return
+    with connect(db) as conn:
+        conn.execute("CREATE SCHEMA IF NOT EXISTS ops")
+        for file in files:
+            path = file.replace("'", "''")
+            conn.execute(f"ATTACH '{path}' AS spider_telemetry (READ_ONLY)")
+            tables = conn.execute(
+                "SELECT 1 FROM information_schema.tables WHERE table_catalog = 'spider_telemetry' "
+                "AND table_schema = 'ops' AND table_name = 'crawl_metrics'"
+            ).fetchall()
+            if tables:
+                conn.execute("CREATE TABLE IF NOT EXISTS ops.crawl_metrics AS SELECT * FROM spider_telemetry.ops.crawl_metrics LIMIT 0")
+                conn.execute("INSERT INTO ops.crawl_metrics BY NAME SELECT * FROM spider_telemetry.ops.crawl_metrics")
+            conn.execute("DETACH spider_telemetry")
+            os.remove(file)
+    logging.info(f"Telemetria de {len(files)} spider(s) copiada para ops.crawl_metrics.")
+
+
+def month_digests(db: str):
+    """
+    Hash de cada mês do lake a partir dos hashes dos arquivos no manifesto.
+
+    Args:
+        - db (str): Banco de dados DuckDB
+    """
+    with connect(db) as conn:
+        create_manifest(conn)
+        rows = conn.execute(
+            f"SELECT date_ref, arquivo, hash FROM {MANIFEST_TABLE} "
+            "WHERE tabela LIKE '%date_ref=%' ORDER BY date_ref, arquivo"
+        ).fetchall()
+    digests = {}
+    for date_ref, arquivo, digest in rows:
+        digests.setdefault(date_ref, hashlib.sha256()).update(f"{arquivo}:{digest}\n".encode())
+    return {date_ref: digest.hexdigest() for date_ref, digest in digests.items()}
+
+
+def dbt_digests():
+    """
+    Hash do conteúdo de cada entrada do projeto dbt (modelos, macros, seeds,
+    source.yml e dbt_project.yml), pelo caminho relativo à pasta dwh.
+    """
+    patterns = ["dbt_project.yml", "macros/*.sql", "models/**/*.sql", "models/bronze/source.yml", "seeds/*.csv"]
+    files = sorted({file for pattern in patterns for file in glob.glob(os.path.join(DWH_DIR, pattern), recursive=True)})
+    return {os.path.relpath(file, DWH_DIR).replace(os.sep, "/"): file_hash(file) for file in files}
+
+
+def changed_keys(atual: dict, anterior: dict):
+    """
+    Chaves novas ou com hash diferente do estado anterior.
+
+    Args:
+        - atual (dict): Hashes atuais
+        - anterior (dict): Hashes do último dbt bem-sucedido
+    """
+    return sorted(key for key, digest in atual.items() if anterior.get(key) != digest)
+
+
+def dbt_plan(meses: list, arquivos: list, ultimo_mes: str):
+    """
+    Monta os comandos do dbt para as entradas alteradas, na ordem.
+
+    Args:
+        - meses (list): Meses do lake alterados ('YYYY-MM')
+        - arquivos (list): Arquivos do projeto dbt alterados
+        - ultimo_mes (str): Mês mais recente do lake
+    """
+    name = lambda file: os.path.splitext(os.path.basename(file))[0]
+    seeds = [name(file) for file in arquivos if file.startswith("seeds/")]
+    models = [name(file) for file in arquivos if file.startswith("models/") and file.endswith(".sql")]
+    completo = any(fnmatch.fnmatch(file, pattern) for file in arquivos for pattern in DBT_GLOBAL_INPUTS)
+
+    commands = []
+    if seeds or completo:
+        commands.append(["seed"] + ([] if completo else ["--select"] + seeds))
+    if completo:
+        return commands + [["run"]]
+
+    selecao = [f"{model}+" for model in models] + [f"{seed}+" for seed in seeds]
+    if meses:
+        # Sem --vars a silver só refaz o último mês; meses anteriores vão um a um
+        for mes in meses:
+            if mes != ultimo_mes:
+                commands.append(["run", "--select", "silver_imoveis", "--vars", json.dumps({'date_ref': mes})])
+        selecao.append("silver_imoveis+")
+    if selecao:
+        commands.append(["run", "--select"] + selecao)
+    return commands
+
+
+def run_dbt(commands: list, db: str, profiles_dir: str = None):
+    """
+    Executa os comandos do dbt na pasta dwh e retorna os tempos de cada um.
+    Cada 'dbt run' tem o perfil por modelo gravado em ops.build_metrics.
+
+    Args:
+        - commands (list): Argumentos de cada comando ('run', 'seed', ...)
+        - db (str): Banco de dados DuckDB
+        - profiles_dir (str): Pasta do profiles.yml (padrão do dbt se vazio)
+    """
+    tempos = {}
+    for index, args in enumerate(commands):
+        inicio = time.perf_counter()
+        if args[0] == "run":
+            with connect(db) as conn:
+                antes = table_counts(conn)
+            build_id, modelos, returncode = profile_run(args[1:], profiles_dir=profiles_dir)
+            with connect(db) as conn:
+                record_build(conn, build_id, modelos, 1, antes)
+            if returncode != 0:
+                raise RuntimeError(f"dbt {' '.join(args)} falhou.")
+        else:
+            command = ["dbt"] + args + (["--profiles-dir", profiles_dir] if profiles_dir else [])
+            logging.info(f"Executando '{' '.join(command)}'.")
+            process = subprocess.run(command, cwd=DWH_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            if process.returncode != 0:
+                raise RuntimeError(f"{' '.join(command)} falhou: {process.stdout.decode(errors='replace')[-2000:]}")
+        tempos[f"dbt_{index + 1}_{args[0]}"] = time.perf_counter() - inicio
+    return tempos
+
+
+def load_state(path: str):
+    """
+    Lê o estado da última execução do dbt ({'meses': ..., 'dbt': ...}).
+
+    Args:
+        - path (str): Arquivo de estado
+    """
+    if not os.path.exists(path):
+        return {'meses': {}, 'dbt': {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path: str, state: dict):
+    """
+    Grava o estado do dbt de forma atômica.
+
+    Args:
+        - path (str): Arquivo de estado
+        - state (dict): Hashes dos meses do lake e das entradas do dbt
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raspagem, ingestão e dbt do mês, refazendo só o que mudou.")
+    parser.add_argument("--date-ref", default=time.strftime("%Y-%m"), help="Mês da raspagem (YYYY-MM)")
+    parser.add_argument("--spiders", nargs="*", choices=SPIDERS, default=SPIDERS, help="Portais a raspar")
+    parser.add_argument("--reraspar", action="store_true", help="Raspa mesmo que o arquivo do mês já exista")
+    parser.add_argument("-s", "--setting", action="append", default=[], help="Setting do Scrapy (NOME=valor)")
+    parser.add_argument("--raw-dir", default="data/raw", help="Pasta com as pastas <mes>-<ano>")
+    parser.add_argument("--db", default="data/database.duckdb", help="Banco de dados DuckDB")
+    parser.add_argument("--lake-dir", default="data/lake/imoveis", help="Pasta da tabela no lake")
+    parser.add_argument("--estado", default="data/pipeline_state.json", help="Hashes do último dbt")
+    parser.add_argument("--profiles-dir", help="Pasta do profiles.yml do dbt")
+    parser.add_argument("--saida", default="data/telemetry/pipeline_runs.jsonl", help="Tempos das etapas")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    ano, mes = args.date_ref.split("-")
+    folder = os.path.normpath(os.path.join(args.raw_dir, f"{MESES[int(mes) - 1]}-{ano}"))
+    lake_dir = args.lake_dir
+    partition = os.path.join(lake_dir, f"date_ref={args.date_ref}")
+
+    with connect(args.db) as conn:
+        create_manifest(conn)
+        manifest = {
+            arquivo: (tamanho, digest)
+            for arquivo, tamanho, digest in conn.execute(
+                f"SELECT arquivo, tamanho, hash FROM {MANIFEST_TABLE} WHERE tabela = ?", [partition]
+            ).fetchall()
+        }
+
+    tempos = {}
+    falhas = 0
+    raspar = [
+        spider for spider in args.spiders
+        if args.reraspar or not os.path.exists(os.path.join(folder, f"{spider}.json"))
+    ]
+    for spider in sorted(set(args.spiders) - set(raspar)):
+        logging.info(f"Arquivo do mês de '{spider}' já existe, raspagem ignorada.")
+    dedup = dict(setting.split("=", 1) for setting in args.setting if setting.startswith("DEDUP_"))
+    linker = FeedLinker(
+        dedup.get("DEDUP_MODE", crawl_settings.DEDUP_MODE),
+        float(dedup.get("DEDUP_THRESHOLD", crawl_settings.DEDUP_THRESHOLD)),
+    )
+    tempos['deduplicacao'] = 0.0
+    ordem, pendentes = list(SPIDERS), set(raspar)
+    with ThreadPoolExecutor(max_workers=len(SPIDERS) + len(raspar)) as pool:
+        raspagens = {
+            pool.submit(crawl, spider, os.path.join(folder, f"{spider}.json"), args.date_ref, args.db, args.setting): spider
+            for spider in raspar
+        }
+        ingestoes = {}
+        ativos = set(raspagens)
+        while True:
+            # Um portal é ligado e ingerido quando ele e os anteriores em SPIDERS terminaram
+            for spider in ready_spiders(ordem, pendentes):
+                feed = os.path.join(folder, f"{spider}.json")
+                if not os.path.exists(feed):
+                    continue
+                inicio_dedup = time.perf_counter()
+                linker.link(ORIGENS[spider], feed)
+                tempos['deduplicacao'] += time.perf_counter() - inicio_dedup
+                future = pool.submit(ingest_feed, feed, args.date_ref, lake_dir, manifest)
+                ingestoes[future] = feed
+                ativos.add(future)
+            if not ativos:
+                break
+            prontos, ativos = wait(ativos, return_when=FIRST_COMPLETED)
+            for future in prontos:
+                if future in raspagens:
+                    spider = raspagens[future]
+                    pendentes.discard(spider)
+                    try:
+                        tempos[f"raspagem_{spider}"] = future.result()
+                    except RuntimeError as e:
+                        # Um portal com erro não impede a ingestão e o dbt dos outros
+                        logging.error(str(e))
+                        falhas += 1
+                        continue
+                    logging.info(f"Raspagem '{spider}' concluída em {tempos[f'raspagem_{spider}']:.2f}s.")
+                    continue
+                feed = ingestoes[future]
+                ingestao = future.result()
+                tempos[f"ingestao_{os.path.splitext(os.path.basename(feed))[0]}"] = ingestao['segundos']
+                if ingestao['result'] is None:
+                    continue
+                file_path, _, linhas, _, _ = ingestao['result']
+                with connect(args.db) as conn:
+                    origem = get_origin(os.path.basename(file_path), ORIGENS)
+                    record_file(conn, file_path, partition, origem, args.date_ref, ingestao['digest'], linhas)
+                logging.info(f"'{lake_file(lake_dir, args.date_ref, file_path)}': {linhas} linhas publicadas.")
+    merge_telemetry(args.db, raspar)
+
+    state = load_state(args.estado)
+    meses_atuais = month_digests(args.db)
+    dbt_atual = dbt_digests()
+    meses = changed_keys(meses_atuais, state['meses'])
+    arquivos = changed_keys(dbt_atual, state['dbt'])
+    commands = dbt_plan(meses, arquivos, max(meses_atuais, default=None))
+
+    if not commands:
+        logging.info("Nenhuma entrada do dbt alterada, dbt ignorado.")
+    elif shutil.which("dbt") is None:
+        logging.warning(f"dbt não encontrado no PATH; pendente para a próxima execução: {commands}")
+    else:
+        logging.info(f"Meses alterados: {meses or '-'} | arquivos do dbt alterados: {arquivos or '-'}")
+        tempos.update(run_dbt(commands, args.db, args.profiles_dir))
+        inicio_publicacao = time.perf_counter()
+        publish(args.db)
+        tempos['publicacao'] = time.perf_counter() - inicio_publicacao
+        with connect(args.db) as conn:
+            log_report(regression_report(conn), 0.5)
+    if not commands or shutil.which("dbt"):
+        save_state(args.estado, {'meses': meses_atuais, 'dbt': dbt_atual})
+
+    tempos['total'] = time.perf_counter() - inicio
+    os.makedirs(os.path.dirname(args.saida) or ".", exist_ok=True)
+    with open(args.saida, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            'executado_em': datetime.now().isoformat(timespec="seconds"), 'date_ref': args.date_ref,
+            'meses_alterados': meses, 'arquivos_dbt_alterados': arquivos,
+            'etapas': {etapa: round(segundos, 3) for etapa, segundos in tempos.items()},
+        }, ensure_ascii=False) + "\n")
+    for etapa, segundos in tempos.items():
+        logging.info(f"{etapa}: {segundos:.2f}s")
+    if falhas:
+        raise SystemExit(f"{falhas} portal(is) com erro na raspagem.")
+
+
+if __name__ == "__main__":
+    main()
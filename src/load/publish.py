@@ -0,0 +1,85 @@
+"""
+Publica o warehouse para o dashboard.
+
+O dashboard não lê o data/database.duckdb, em que a ingestão e o dbt
+escrevem: lê uma cópia somente leitura publicada em
+data/published/database-<build_id>.duckdb. A publicação faz CHECKPOINT no
+banco, copia o arquivo e troca de uma vez o ponteiro
+data/published/current.json ({'build_id', 'arquivo', 'publicado_em'}).
+As sessões do dashboard passam para a cópia nova na próxima consulta e as
+consultas em andamento terminam na anterior. As cópias mais antigas que as
+--manter últimas são apagadas.
+
+Uso (a partir da raiz do projeto, depois de um 'dbt run'):
+    python src/load/publish.py
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+
+import duckdb
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+POINTER = "current.json"
+
+
+def publish(db: str = "data/database.duckdb", pasta: str = "data/published", manter: int = 2):
+    """
+    Copia o banco para a pasta de publicação e aponta o dashboard para a
+    cópia. Retorna o build_id publicado.
+
+    Args:
+        - db (str): Banco de dados DuckDB do warehouse
+        - pasta (str): Pasta das cópias publicadas
+        - manter (int): Cópias mantidas na pasta (a atual e as anteriores)
+    """
+    os.makedirs(pasta, exist_ok=True)
+    # O CHECKPOINT leva o WAL para o arquivo principal, que então pode ser copiado
+    with duckdb.connect(db) as conn:
+        conn.execute("CHECKPOINT")
+
+    build_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    arquivo = f"database-{build_id}.duckdb"
+    shutil.copyfile(db, os.path.join(pasta, f"{arquivo}.tmp"))
+    os.replace(os.path.join(pasta, f"{arquivo}.tmp"), os.path.join(pasta, arquivo))
+
+    pointer = os.path.join(pasta, POINTER)
+    with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            'build_id': build_id,
+            'arquivo': arquivo,
+            'publicado_em': datetime.now().isoformat(timespec="seconds"),
+        }, f)
+    os.replace(f"{pointer}.tmp", pointer)
+    logging.info(f"Build {build_id} publicado em '{os.path.join(pasta, arquivo)}'.")
+
+    # Sessões ainda abertas nas cópias antigas continuam lendo o arquivo já apagado
+    copias = sorted(file for file in os.listdir(pasta) if file.startswith("database-") and file.endswith(".duckdb"))
+    for file in copias[:-manter]:
+        try:
+            os.remove(os.path.join(pasta, file))
+            logging.info(f"Cópia antiga '{file}' removida.")
+        except OSError as e:
+            logging.warning(f"Não foi possível remover '{file}': {e}")
+    return build_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publica uma cópia somente leitura do warehouse para o dashboard.")
+    parser.add_argument("--db", default="data/database.duckdb", help="Banco de dados DuckDB do warehouse")
+    parser.add_argument("--pasta", default="data/published", help="Pasta das cópias publicadas")
+    parser.add_argument("--manter", type=int, default=2, help="Cópias mantidas na pasta")
+    args = parser.parse_args()
+    publish(args.db, args.pasta, args.manter)
+
+
+if __name__ == "__main__":
+    main()
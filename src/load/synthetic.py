@@ -0,0 +1,188 @@
+"""
+Gerador de dados sintéticos no formato bruto das spiders, para testar a
+ingestão e os modelos do dbt em volumes maiores que os meses raspados.
+
+As distribuições vêm de data/processed/dataset_completo.csv: cada linha
+sintética reamostra um anúncio real (o que preserva a frequência de cada
+tipo/localização e a distribuição conjunta de área, cômodos e preço dentro
+dela), com pequenas variações de área e preço. Os arquivos imitam a saída
+histórica das spiders (campos em texto) e incluem as sujeiras observadas
+nas raspagens: faixas ('48-60'), nulos, 'Valor sob consulta', condomínio
+com prefixo ou IPTU, cards desalinhados do Chaves na Mão e linhas repetidas
+em sequência.
+
+Uso (a partir da raiz do projeto):
+    python src/load/synthetic.py --linhas 1000000 --saida data/synthetic
+"""
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+PROFILE_PATH = "data/processed/dataset_completo.csv"
+MESES = ["abr-2025", "mai-2025", "jun-2025"]
+
+# Participação de cada portal e taxa de linhas repetidas em sequência
+PORTAIS = {
+    "chaves": {'share': 0.26, 'duplicadas': 0.05},
+    "vivareal": {'share': 0.23, 'duplicadas': 0.10},
+    "zap": {'share': 0.51, 'duplicadas': 0.50},
+}
+
+FAIXA_RATE = 0.03
+SOB_CONSULTA_RATE = 0.005
+MOEDA_RATE = 0.02
+SEM_VAGAS_RATE = 0.08
+SEM_CONDO_RATE = 0.6
+IPTU_RATE = 0.1
+CIDADE_RATE = 0.02
+DESALINHADO_RATE = 0.01
+
+
+def load_profile(csv_path: str = PROFILE_PATH):
+    """
+    Lê os anúncios tratados que servem de base para as distribuições.
+
+    Args:
+        - csv_path (str): Caminho do dataset_completo.csv
+    """
+    columns = ['tipo', 'localizacao', 'area', 'quartos', 'banheiros', 'vagas', 'preco', 'condo']
+    return pd.read_csv(csv_path, usecols=columns)[columns]
+
+
+def _text(values):
+    return values.astype(np.int64).astype(str).astype(object)
+
+
+def _mask(rng, size, rate):
+    return rng.random(size) < rate
+
+
+def generate_chunk(profile: pd.DataFrame, size: int, portal: str, rng: np.random.Generator):
+    """
+    Gera 'size' anúncios brutos de um portal, com as chaves e os textos
+    como a spider do portal grava no .json.
+
+    Args:
+        - profile (pd.DataFrame): Anúncios base (load_profile)
+        - size (int): Quantidade de linhas
+        - portal (str): 'chaves', 'vivareal' ou 'zap'
+        - rng (np.random.Generator): Gerador de números aleatórios
+    """
+    # Linhas repetidas em sequência, como nas páginas que os portais repetem
+    repeats = 1 + _mask(rng, size, PORTAIS[portal]['duplicadas'])
+    index = np.repeat(np.arange(size), repeats)[:size]
+    base = profile.iloc[rng.integers(0, len(profile), size)[index]].reset_index(drop=True)
+
+    area = np.clip(np.round(base['area'] * np.exp(rng.normal(0, 0.08, size))), 20, 5000)
+    preco = np.maximum(np.round(base['preco'] * np.exp(rng.normal(0, 0.1, size)), -3), 1000)
+    quartos, banheiros, vagas = base['quartos'].to_numpy(), base['banheiros'].to_numpy(), base['vagas'].to_numpy()
+
+    df = pd.DataFrame({
+        'tipo': base['tipo'].to_numpy(dtype=object),
+        'localizacao': base['localizacao'].to_numpy(dtype=object),
+        'area': _text(area),
+        'quartos': _text(quartos),
+        'banheiros': _text(banheiros),
+        'vagas': _text(vagas),
+        'preco': _text(preco),
+        'condo': _text(base['condo'].fillna(0)),
+    })
+
+    faixa = _mask(rng, size, FAIXA_RATE)
+    df.loc[faixa, 'area'] = df.loc[faixa, 'area'] + "-" + _text(area[faixa] + rng.integers(5, 40, faixa.sum()))
+    df.loc[faixa, 'quartos'] = df.loc[faixa, 'quartos'] + "-" + _text(quartos[faixa] + 1)
+
+    moeda = _mask(rng, size, MOEDA_RATE)
+    df.loc[moeda, 'preco'] = ["R$ " + f"{value:,.0f}".replace(",", ".") for value in preco[moeda]]
+    df.loc[_mask(rng, size, SOB_CONSULTA_RATE), 'preco'] = "Valor sob consulta"
+    df.loc[_mask(rng, size, SEM_VAGAS_RATE), 'vagas'] = None
+    df.loc[_mask(rng, size, CIDADE_RATE), 'localizacao'] += ", Fortaleza"
+
+    sem_condo = _mask(rng, size, SEM_CONDO_RATE) | (base['condo'].fillna(0) <= 0).to_numpy()
+    if portal == "chaves":
+        desalinhado = _mask(rng, size, DESALINHADO_RATE)
+        df.loc[desalinhado, ['area', 'quartos', 'banheiros', 'vagas']] = [" Quartos", " Garagem", None, " Banheiros"]
+        df.loc[sem_condo, 'condo'] = None
+        return df[['preco', 'tipo', 'localizacao', 'area', 'quartos', 'banheiros', 'vagas', 'condo']]
+
+    condo = base['condo'].fillna(0).to_numpy()
+    iptu = _mask(rng, size, IPTU_RATE)
+    df['condo'] = [
+        f"{'IPTU' if is_iptu else 'Cond.'} R$ " + f"{value:,.0f}".replace(",", ".")
+        for value, is_iptu in zip(condo, iptu)
+    ]
+    df.loc[sem_condo, 'condo'] = None
+    return df
+
+
+def write_json(path: str, chunks):
+    """
+    Grava os blocos de linhas como um único array JSON, como os feeds do Scrapy.
+
+    Args:
+        - path (str): Caminho do arquivo .json
+        - chunks: Iterável de pd.DataFrame
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    first = True
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for df in chunks:
+            if df.empty:
+                continue
+            records = df.to_json(orient="records", force_ascii=False)[1:-1].replace("},{", "},\n{")
+            f.write(records if first else ",\n" + records)
+            first = False
+        f.write("\n]")
+    os.replace(f"{path}.tmp", path)
+
+
+def generate(linhas: int, saida: str, meses: list = MESES, seed: int = 42,
+             chunk_size: int = 200_000, profile_path: str = PROFILE_PATH):
+    """
+    Gera 'linhas' anúncios divididos entre os meses e os portais, em
+    <saida>/<mes>-<ano>/<portal>.json.
+
+    Args:
+        - linhas (int): Total de linhas
+        - saida (str): Pasta de saída
+        - meses (list): Pastas de mês a gerar (ex: ['jun-2025'])
+        - seed (int): Semente do gerador
+        - chunk_size (int): Linhas por bloco gravado
+        - profile_path (str): Caminho do dataset_completo.csv
+    """
+    rng = np.random.default_rng(seed)
+    profile = load_profile(profile_path)
+    inicio = time.perf_counter()
+    for mes in meses:
+        for portal, config in PORTAIS.items():
+            size = int(round(linhas / len(meses) * config['share']))
+            sizes = [min(chunk_size, size - start) for start in range(0, size, chunk_size)]
+            path = os.path.join(saida, mes, f"{portal}.json")
+            write_json(path, (generate_chunk(profile, n, portal, rng) for n in sizes))
+            logging.info(f"Arquivo '{path}' gerado com {size} linhas.")
+    logging.info(f"{linhas} linhas geradas em {time.perf_counter() - inicio:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera anúncios sintéticos no formato bruto das spiders.")
+    parser.add_argument("--linhas", type=int, default=100_000, help="Total de linhas (ex: 10000 a 10000000)")
+    parser.add_argument("--saida", default="data/synthetic", help="Pasta de saída")
+    parser.add_argument("--meses", nargs="*", default=MESES, help="Pastas de mês a gerar")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador")
+    args = parser.parse_args()
+    generate(args.linhas, args.saida, args.meses, args.seed)
+
+
+if __name__ == "__main__":
+    main()